@@ -1,11 +1,32 @@
 import requests
 from bs4 import BeautifulSoup
 import argparse
+import codecs
+import html
+import itertools
+import json
+import os
 import random
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+RESOLVED_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "llm-scripts", "fark-resolved.json")
+MAX_CACHE_ENTRIES = 20000
+RESOLVE_WORKERS = 16
+# Redirect pages are only read this far when looking for the meta refresh
+MAX_HEAD_BYTES = 64 * 1024
+# ...and this far when falling back to the first link in the body
+MAX_BODY_BYTES = 512 * 1024
+META_TAG_RE = re.compile(r'<meta\s[^>]*>', re.I)
+REFRESH_URL_RE = re.compile(r'content\s*=\s*["\'][^"\']*?url\s*=\s*["\']?([^"\'>\s]+)', re.I)
+FIRST_LINK_RE = re.compile(r'<a\s[^>]*href=["\']([^"\']+)', re.I)
 
 def fetch_fark_headlines():
     url = "https://www.fark.com/"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    headers = {'User-Agent': USER_AGENT}
     response = requests.get(url, headers=headers)
     response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
     return response.content
@@ -33,40 +54,131 @@ def parse_fark_headlines(html_content):
                                 headlines.append({"url": url, "tag": tag})
     return headlines
 
-def resolve_redirect_url(url):
+def load_resolved_cache(path=RESOLVED_CACHE):
+    """Load the persisted redirect -> target mapping."""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        refresh_tag = soup.find("meta", attrs={"http-equiv": "refresh"})
-        if refresh_tag:
-            content = refresh_tag["content"]
-            redirect_url = content.split("url=")[-1]
-            return redirect_url
-        else:
-            a_tag = soup.find("a")
-            if a_tag:
-                redirect_url = a_tag["href"]
-                return redirect_url
-            else:
-                return url  # If no meta refresh tag or a tag is found, return the original URL
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_resolved_cache(cache, path=RESOLVED_CACHE):
+    """Persist the redirect -> target mapping, keeping only the newest entries."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    items = list(cache.items())[-MAX_CACHE_ENTRIES:]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dict(items), f)
+    os.replace(tmp_path, path)
+
+def make_session(pool_size=RESOLVE_WORKERS):
+    """Return a requests session whose connection pool fits pool_size threads."""
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def iter_body_text(response, limit=MAX_BODY_BYTES):
+    """Yield the decoded body read so far after each chunk, stopping after limit bytes."""
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    text = ""
+    size = 0
+    for chunk in response.iter_content(chunk_size=4096):
+        size += len(chunk)
+        text += decoder.decode(chunk)
+        yield text
+        if size >= limit:
+            return
+
+def find_meta_refresh(head):
+    """Return the target of a meta refresh tag in head, or None."""
+    for tag in META_TAG_RE.findall(head):
+        if re.search(r'http-equiv\s*=\s*["\']?refresh', tag, re.I):
+            match = REFRESH_URL_RE.search(tag)
+            if match:
+                return html.unescape(match.group(1))
+    return None
+
+def resolve_redirect_url(url, session=None):
+    """Return the URL a Fark redirect link points to.
+
+    HTTP redirects are followed with a HEAD request. If that stays on the same
+    host, the page is read up to </head> (or MAX_HEAD_BYTES) and searched for a
+    meta refresh. Without one, reading continues up to MAX_BODY_BYTES until the
+    first link is found.
+    """
+    session = session or make_session(1)
+    try:
+        response = session.head(url, allow_redirects=True, timeout=10)
+        if response.ok and urlsplit(response.url).netloc != urlsplit(url).netloc:
+            return response.url
+
+        with session.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            pages = iter_body_text(response)
+            text = ""
+            for text in pages:
+                if "</head>" in text.lower() or len(text) >= MAX_HEAD_BYTES:
+                    break
+            target = find_meta_refresh(text)
+            if target:
+                return target
+            searched = 0
+            for text in itertools.chain([text], pages):
+                # Back up a little so a tag split across chunks is still found.
+                match = FIRST_LINK_RE.search(text, max(0, searched - 512))
+                if match:
+                    return html.unescape(match.group(1))
+                searched = len(text)
+        return url  # If no meta refresh tag or link is found, return the original URL
     except requests.exceptions.RequestException as e:
-        print(f"Error resolving URL {url}: {e}")
-        return url  # Return the original URL on error
+        print(f"Error resolving URL {url}: {e}", file=sys.stderr)
+        return None
+
+def resolve_all(urls, workers=RESOLVE_WORKERS, cache=None):
+    """Resolve many redirect URLs concurrently over one pooled session.
+
+    Results are looked up in and added to cache (a dict). Failed resolutions
+    map to the original URL and are not cached.
+    """
+    cache = {} if cache is None else cache
+    pending = sorted({url for url in urls if url not in cache})
+    resolved = {url: cache[url] for url in urls if url in cache}
+    if pending:
+        session = make_session(workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for url, target in zip(pending, pool.map(lambda u: resolve_redirect_url(u, session), pending)):
+                if target:
+                    cache[url] = target
+                resolved[url] = target or url
+    return resolved
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Fetch and parse Fark headlines.")
     parser.add_argument("--shuffle", action="store_true", help="Shuffle the output.")
     parser.add_argument("--resolve", help="Resolve the redirect URL.")
+    parser.add_argument("--resolve-all", action="store_true", help="Resolve every headline URL concurrently before printing.")
+    parser.add_argument("--workers", type=int, default=RESOLVE_WORKERS, help=f"Concurrent resolutions for --resolve-all (default: {RESOLVE_WORKERS}).")
     args = parser.parse_args()
 
     if args.resolve:
-        resolved_url = resolve_redirect_url(args.resolve)
+        cache = load_resolved_cache()
+        resolved_url = resolve_all([args.resolve], workers=1, cache=cache)[args.resolve]
+        save_resolved_cache(cache)
         print(resolved_url)
     else:
         html_content = fetch_fark_headlines()
         headlines = parse_fark_headlines(html_content)
 
+        if args.resolve_all:
+            cache = load_resolved_cache()
+            resolved = resolve_all([headline['url'] for headline in headlines], workers=args.workers, cache=cache)
+            save_resolved_cache(cache)
+            for headline in headlines:
+                headline['url'] = resolved[headline['url']]
+
         if args.shuffle:
             random.shuffle(headlines)
 
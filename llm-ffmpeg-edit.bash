@@ -16,6 +16,10 @@ frame_rate=2         # Frames per second to extract
 frames_per_batch=20  # Number of frames to send to LLM per batch
 output_clip_name="clipped_video.mp4" # Default output filename for the clipped video
 full_mode=false      # New: Option to scan full video and concatenate all detections
+coarse_to_fine=false # Probe windows of batches and refine at the edges instead of checking every batch
+search_stride=4      # Batches covered by each coarse probe of the coarse-to-fine search
+dedup_frames=false   # Drop near-identical consecutive frames before the vision calls
+annotate_skips=false # Tell the model which frames stand for skipped near-duplicates
 # Determine appropriate temperature based on the available model
 # Query the model list from the local server
 model_list_json=$(curl -s localhost:9595/models) || {
@@ -37,11 +41,6 @@ first_clip_start_time=-1
 first_clip_end_time=-1
 first_clip_identified=false # Flag to indicate if the first clip has been fully identified (start and end)
 
-# Variables for tracking the *current* continuous segment (for building `all_detected_segments` and also used by first_clip logic)
-current_segment_start=-1
-current_segment_end=-1
-segment_in_progress=false # Flag to indicate if a continuous segment is currently being built
-
 # Array to store all detected segments [start_time,end_time] for --full mode
 declare -a all_detected_segments
 declare -a POSITIONAL_ARGS=() # Array to store positional arguments
@@ -78,6 +77,23 @@ while [[ $# -gt 0 ]]; do
       full_mode=true
       shift
       ;;
+    -cf|--coarse-to-fine)
+      coarse_to_fine=true
+      shift
+      ;;
+    --stride)
+      search_stride="$2"
+      shift 2
+      ;;
+    -d|--dedup)
+      dedup_frames=true
+      shift
+      ;;
+    --annotate-skips)
+      dedup_frames=true
+      annotate_skips=true
+      shift
+      ;;
     -l|--local-file) # New flag for local file input
       use_local_file=true
       local_file_path="$2"
@@ -93,6 +109,10 @@ while [[ $# -gt 0 ]]; do
       echo "  -fr, --frame-rate <rate>     Frames per second to extract (default: 2)"
       echo "  -fb, --frames-per-batch <num> Number of frames per batch sent to LLM (default: 20)"
       echo "  -f, --full                   Scan full video and concatenate all detections"
+      echo "  -cf, --coarse-to-fine        Probe windows of batches and refine at the edges (fewer calls; may miss short segments)"
+      echo "  --stride <num>               Batches per coarse probe with --coarse-to-fine (default: 4)"
+      echo "  -d, --dedup                  Drop near-identical consecutive frames before the vision calls"
+      echo "  --annotate-skips             With --dedup, tell the model which frames stand for skipped ones"
       echo "  -l, --local-file <path>      Use a local video file instead of downloading"
       echo "  --help                       Show this help message and exit"
       echo ""
@@ -144,6 +164,10 @@ if ( [ -z "$video_url" ] && [ -z "$local_file_path" ] ) || [ -z "$thing_to_detec
   echo "  -fr, --frame-rate <rate>     Frames per second to extract (default: 2)" >&2
   echo "  -fb, --frames-per-batch <num> Number of frames per batch sent to LLM (default: 20)" >&2
   echo "  -f, --full                   Scan full video and concatenate all detections" >&2
+  echo "  -cf, --coarse-to-fine        Probe windows of batches and refine at the edges (fewer calls; may miss short segments)" >&2
+  echo "  --stride <num>               Batches per coarse probe with --coarse-to-fine (default: 4)" >&2
+  echo "  -d, --dedup                  Drop near-identical consecutive frames before the vision calls" >&2
+  echo "  --annotate-skips             With --dedup, tell the model which frames stand for skipped ones" >&2
   echo "  -l, --local-file <path>      Use a local video file instead of downloading" >&2
   echo "  --help                       Show this help message and exit" >&2
   echo "" >&2
@@ -186,8 +210,15 @@ fi
 echo "Extracting frames..." >&2
 # Extract frames from the video
 if $scene_change; then
-  # Extract scene frames with fixed frame rate and scene detection
-  ffmpeg -i "${video}" -vf "fps=${frame_rate},select='gt(scene,${scene_threshold})'" -vsync vfr -q:v 1 "${temp_dir}/frame_%08d.jpg" 2>/dev/null
+  # Extract scene frames with fixed frame rate and scene detection, named by
+  # pts (the 0-based fixed-rate frame index), then renumber them to the
+  # 1-based frame_N.jpg numbers the frame times are computed from
+  ffmpeg -i "${video}" -vf "fps=${frame_rate},select='gt(scene,${scene_threshold})'" -vsync vfr -frame_pts 1 -q:v 1 "${temp_dir}/scene_%08d.jpg" 2>/dev/null
+  for scene_frame in "${temp_dir}"/scene_*.jpg; do
+    [ -e "$scene_frame" ] || continue
+    scene_number=${scene_frame##*/scene_}
+    mv "$scene_frame" "$(printf '%s/frame_%08d.jpg' "${temp_dir%/}" $((10#${scene_number%.jpg} + 1)))"
+  done
 else
   # Extract frames at a fixed rate
   ffmpeg -i "${video}" -vf "fps=${frame_rate}" -q:v 1 "${temp_dir}/frame_%08d.jpg" 2>/dev/null
@@ -201,112 +232,40 @@ if [ "$num_images" -eq 0 ]; then
   exit 1
 fi
 
-echo "Analyzing video for '${thing_to_detect}'..." >&2
-
-# Loop through the images in batches for detection
-for ((i=0; i<num_images; i+=$frames_per_batch)); do
-  subset=("${images[@]:i:$frames_per_batch}")
-  num_subset=${#subset[@]}
-
-  # Get the starting and ending frame numbers for the current batch
-  start_frame=$((i + 1))
-  end_frame=$((i + $num_subset))
-
-  # Calculate the start and end times in seconds for the current batch (using bc for float arithmetic)
-  current_batch_start_time=$(echo "scale=3; ($start_frame - 1) / $frame_rate" | bc -l)
-  current_batch_end_time=$(echo "scale=3; $end_frame / $frame_rate" | bc -l)
-
-  # Construct the LLM prompt for detection. Request a JSON boolean response.
-  detection_prompt="You are looking at a sequence of JPEG frames.\nThink step‑by‑step about the frames.\nAnswer with a single JSON object containing three fields: \"detected\" (true|false), \"reason\" (brief explanation), and \"frames\" (list of frame numbers where the target appears).\nDetermine if '${thing_to_detect}' appears in any frame. ONLY set \"detected\" to true if you are absolutely certain the target is visible; otherwise set it to false. Do not guess. Only output the JSON, no extra text. If the description is specific, verify that each specified detail appears exactly as given."
-
-  # Construct the command arguments for the Python script
-  cmd_args=("$detection_prompt" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
-  cmd_args+=("${subset[@]}") # Images start at sys.argv[3]
-
-  echo "  Checking frames ${start_frame}-${end_frame} (${current_batch_start_time}s-${current_batch_end_time}s)..." >&2
-
-  # Call the llm-python-vision-multi-images.py script and time it
-  llm_output=$(time -p llm-python-vision-multi-images.py "${cmd_args[@]}")
-  llm_exit_code=$?
-
-  echo "    LLM Raw Output: '$llm_output'" >&2 # Added line to print LLM output
-
-  if [ $llm_exit_code -ne 0 ]; then
-    echo "  Warning: LLM script exited with error code $llm_exit_code for frames ${start_frame}-${end_frame}. Output: $llm_output. Skipping this batch." >&2
-    continue
-  fi
-
-  # Strip markdown code blocks while preserving JSON structure for parsing
-  clean_output=$(printf '%s' "$llm_output" | sed 's/```json//Ig' | sed 's/```//g' | tr -d '\r')
-  # Parse the JSON output from the LLM. Expected format: {"detected": true} or {"detected": false}
-  detected=$(printf '%s' "$clean_output" | jq -r '.detected' 2>/dev/null || echo "")
-  # Convert to lowercase for case-insensitive comparison
-  detected=$(printf '%s' "$detected" | tr -d '[:space:]' | tr '[:upper:]' '[:lower:]')
-  # Fallback handling if JSON parsing fails
-  if [[ "$detected" != "true" && "$detected" != "false" ]]; then
-    clean_output_lower=$(printf '%s' "$clean_output" | tr '[:upper:]' '[:lower:]')
-    # Check for JSON boolean pattern or legacy YES/NO
-    if [[ "$clean_output_lower" =~ \"detected\"[[:space:]]*:[[:space:]]*true ]] || [[ "$clean_output_lower" =~ \"detected\"[[:space:]]*:[[:space:]]*\"true\" ]] || [[ "$clean_output_lower" == *"yes"* ]]; then
-      detected="true"
-    else
-      detected="false"
-    fi
-  fi
-
-  # Define the target directory for copying frames
-  target_copy_dir=""
-  if [[ "$detected" == "true" ]]; then
-    target_copy_dir="${temp_dir}/YES"
-    if ! $segment_in_progress; then
-      # Start of a new continuous segment
-      current_segment_start=$current_batch_start_time
-      segment_in_progress=true
-      echo "  Detected '${thing_to_detect}' starting at ${current_segment_start}s (frame ${start_frame})." >&2
-    fi
-    current_segment_end=$current_batch_end_time # Extend the end time of the current segment
-  else
-    target_copy_dir="${temp_dir}/NO"
-    if $segment_in_progress; then
-      # A continuous segment just ended
-      detected_end_frame_num=$(echo "scale=0; ($current_segment_end * $frame_rate) + 1" | bc) # Calculate frame number for the end of the detected segment
-      all_detected_segments+=("${current_segment_start},${current_segment_end}")
-      echo "  Detection of '${thing_to_detect}' ended at ${current_segment_end}s (frame ${detected_end_frame_num}). Stored segment: ${current_segment_start}-${current_segment_end}" >&2
-      
-      # If not in full mode, and this is the first segment we've identified, then we are done.
-      if ! $full_mode && ! $first_clip_identified; then
-        first_clip_start_time=$current_segment_start
-        first_clip_end_time=$current_segment_end
-        first_clip_identified=true
-        break # Exit the loop as we found the first continuous segment
-      fi
+# Drop near-identical frames; the kept frames keep their numbers, so timestamps are unchanged
+if $dedup_frames; then
+  llm_frame_dedup.py --frame-rate "$frame_rate" "$temp_dir" || echo "Warning: Frame deduplication failed; using all frames." >&2
+fi
 
-      segment_in_progress=false
-      current_segment_start=-1 # Reset
-      current_segment_end=-1   # Reset
-    fi
-  fi
+echo "Analyzing video for '${thing_to_detect}'..." >&2
 
-  # Copy frames to the respective YES/NO directory
-  if [ -n "$target_copy_dir" ]; then
-    mkdir -p "$target_copy_dir" # Ensure directory exists
-    for frame_path in "${subset[@]}"; do
-      cp "$frame_path" "$target_copy_dir/" || echo "Warning: Failed to copy frame $frame_path to $target_copy_dir" >&2
-    done
-    echo "    Copied ${num_subset} frames to $target_copy_dir" >&2
-  fi
-done # End of loop through batches
+# Find the detected segments with llm-frame-search.py (every batch unless --coarse-to-fine)
+search_args=(--frame-rate "$frame_rate" --frames-per-batch "$frames_per_batch" --stride "$search_stride" --temperature "$temperature" --copy-to "$temp_dir")
+if $full_mode; then
+  search_args+=(--full)
+fi
+if $coarse_to_fine; then
+  search_args+=(--coarse-to-fine)
+fi
+if $annotate_skips; then
+  search_args+=(--annotate)
+fi
+segments_output=$(llm-frame-search.py "${search_args[@]}" "$temp_dir" "$thing_to_detect") || {
+  echo "Error: Frame search failed. Exiting." >&2
+  exit 1
+}
 
-# After the loop, handle any segment that was in progress at the end of the video
-if $segment_in_progress; then
-  detected_end_frame_num=$(echo "scale=0; ($current_segment_end * $frame_rate) + 1" | bc) # Calculate frame number for the end of the detected segment
-  all_detected_segments+=("${current_segment_start},${current_segment_end}")
-  echo "  Detection of '${thing_to_detect}' ended at ${current_segment_end}s (end of video). Stored segment: ${current_segment_start}-${current_segment_end}" >&2
-  # If not in full mode, and this is the first segment we've identified (because it went to end of video)
-  if ! $full_mode && ! $first_clip_identified; then
-    first_clip_start_time=$current_segment_start
-    first_clip_end_time=$current_segment_end
-    first_clip_identified=true
-  fi
+# Each output line is "start,end" in seconds
+while IFS= read -r segment_pair; do
+  [ -z "$segment_pair" ] && continue
+  all_detected_segments+=("$segment_pair")
+  echo "  Detected '${thing_to_detect}' from ${segment_pair%,*}s to ${segment_pair#*,}s." >&2
+done <<< "$segments_output"
+
+# If not in full mode, only the first continuous segment is clipped
+if ! $full_mode && [ ${#all_detected_segments[@]} -gt 0 ]; then
+  IFS=',' read -r first_clip_start_time first_clip_end_time <<< "${all_detected_segments[0]}"
+  first_clip_identified=true
 fi
 
 # --- Clipping Logic ---
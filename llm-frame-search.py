@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Finds the segments of a video where something is visible, using a vision LLM.
+
+This is the detection loop of llm-ffmpeg-edit.bash. It works on the extracted
+frame_XXXXXXXX.jpg files and prints one "start,end" line (in seconds) per
+detected segment on stdout.
+
+The exhaustive search (the default) sends every batch of --frames-per-batch
+consecutive frames to the model. The coarse-to-fine search (--coarse-to-fine)
+first sends one batch per window of --stride batches, with the frames spread evenly across
+the window. It then bisects only the windows at the edge of a detection,
+down to single batches. Windows in the middle of a detected segment and
+windows with no detection are never looked at again. Boundaries come out at
+the same batch resolution as the exhaustive scan with a fraction of the
+vision calls. Segments or gaps shorter than one window can be missed when
+none of the spread frames land in them, so it stays opt-in until
+--benchmark shows it holds up on real footage.
+
+Times come from the frame numbers in the file names, so frames removed by
+llm_frame_dedup.py do not shift the segments. With --annotate, the
+skipped-range note from llm_frame_dedup.py is added to each vision prompt.
+
+Run with --benchmark to compare both searches on fixture videos.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+VISION_SCRIPT = "llm-python-vision-multi-images.py"
+FRAME_RATE = 2
+FRAMES_PER_BATCH = 20
+STRIDE = 4
+TEMPERATURE = "1.0"
+DETECTION_PROMPT = (
+    "You are looking at a sequence of JPEG frames.\nThink step‑by‑step about the frames.\n"
+    "Answer with a single JSON object containing three fields: \"detected\" (true|false), "
+    "\"reason\" (brief explanation), and \"frames\" (list of frame numbers where the target appears).\n"
+    "Determine if '{thing}' appears in any frame. ONLY set \"detected\" to true if you are absolutely "
+    "certain the target is visible; otherwise set it to false. Do not guess. Only output the JSON, no "
+    "extra text. If the description is specific, verify that each specified detail appears exactly as given."
+)
+
+
+def list_frames(frame_dir):
+    """Returns the extracted frame paths in order."""
+    return sorted(glob.glob(os.path.join(frame_dir, "frame_*.jpg")))
+
+
+def frame_number(path):
+    """Returns N for a frame_N.jpg path."""
+    return int(re.search(r"frame_(\d+)\.jpg$", path).group(1))
+
+
+def last_frame_number(frame_dir, frames):
+    """Returns the number of the last extracted frame, including any removed by llm_frame_dedup.py."""
+    try:
+        with open(os.path.join(frame_dir, "frame_ranges.tsv"), "r", encoding="utf-8") as f:
+            return max(int(line.split("\t")[2]) for line in f if line.strip())
+    except (OSError, ValueError, IndexError):
+        return frame_number(frames[-1])
+
+
+def parse_detection(output):
+    """Reads the "detected" flag from the model's answer, with the same fallbacks as the bash loop."""
+    clean = re.sub(r"```(json)?", "", output, flags=re.I).replace("\r", "")
+    match = re.search(r"\{.*\}", clean, re.S)
+    if match:
+        try:
+            detected = json.loads(match.group(0)).get("detected")
+            if isinstance(detected, bool):
+                return detected
+            if str(detected).strip().lower() in ("true", "false"):
+                return str(detected).strip().lower() == "true"
+        except (ValueError, AttributeError):
+            pass
+    lower = clean.lower()
+    return bool(re.search(r'"detected"\s*:\s*"?true', lower)) or "yes" in lower
+
+
+class VisionDetector:
+    """Asks the vision model whether the target is in a list of frames, counting the calls."""
+
+    def __init__(self, thing, temperature=TEMPERATURE, annotate_dir=None):
+        self.prompt = DETECTION_PROMPT.format(thing=thing)
+        self.temperature = str(temperature)
+        self.annotate_dir = annotate_dir
+        self.calls = 0
+
+    def __call__(self, frames):
+        self.calls += 1
+        prompt = self.prompt
+        if self.annotate_dir:
+            from llm_frame_dedup import annotation  # needs Pillow, so only imported for --annotate
+            try:
+                prompt = f"{prompt} {annotation(self.annotate_dir, frames)}".strip()
+            except OSError:
+                pass
+        result = subprocess.run(
+            [VISION_SCRIPT, prompt, self.temperature, *frames],
+            capture_output=True, text=True, errors="ignore",
+        )
+        print(f"    LLM Raw Output: '{result.stdout.strip()}'", file=sys.stderr)
+        if result.returncode != 0:
+            print(f"  Warning: {VISION_SCRIPT} exited with error code {result.returncode}; treating batch as not detected.", file=sys.stderr)
+            return False
+        return parse_detection(result.stdout)
+
+
+class FrameSearch:
+    """
+    Batch-level detection over a list of frames.
+
+    probe(first, last) asks about batches [first, last) using at most
+    frames_per_batch frames spread evenly across them, so a single batch is
+    checked exactly like the exhaustive scan does. Results are memoised.
+
+    A frame covers the time up to the next frame in the list, and the last
+    one covers up to the end of frame last_frame.
+    """
+
+    def __init__(self, frames, detect, frame_rate=FRAME_RATE, frames_per_batch=FRAMES_PER_BATCH, copy_to=None,
+                 last_frame=None):
+        self.frames = frames
+        self.detect = detect
+        self.frame_rate = float(frame_rate)
+        self.frames_per_batch = frames_per_batch
+        self.num_batches = -(-len(frames) // frames_per_batch)
+        self.copy_to = copy_to
+        self.last_frame = last_frame if last_frame is not None else (frame_number(frames[-1]) if frames else 0)
+        self.probes = {}
+
+    def frame_time(self, index):
+        if index >= len(self.frames):
+            return self.last_frame / self.frame_rate
+        return (frame_number(self.frames[index]) - 1) / self.frame_rate
+
+    def batch_time(self, first, last):
+        return (self.frame_time(first * self.frames_per_batch),
+                self.frame_time(min(last * self.frames_per_batch, len(self.frames))))
+
+    def probe(self, first, last):
+        if (first, last) in self.probes:
+            return self.probes[(first, last)]
+        start = first * self.frames_per_batch
+        count = min(last * self.frames_per_batch, len(self.frames)) - start
+        sample = [self.frames[start + (k * count) // self.frames_per_batch]
+                  for k in range(min(count, self.frames_per_batch))]
+        start_time, end_time = self.batch_time(first, last)
+        print(f"  Checking {len(sample)} frames across {start_time:.1f}s-{end_time:.1f}s...", file=sys.stderr)
+        detected = self.detect(sample)
+        self.probes[(first, last)] = detected
+        if self.copy_to:
+            # Same YES/NO sorting of the checked frames as the bash loop.
+            target = os.path.join(self.copy_to, "YES" if detected else "NO")
+            os.makedirs(target, exist_ok=True)
+            for frame in sample:
+                shutil.copy(frame, target)
+        return detected
+
+    def segments(self, labels):
+        """Turns per-batch labels into (start, end) times for each run of detected batches."""
+        segments = []
+        run_start = None
+        for batch, detected in enumerate(labels + [False]):
+            if detected and run_start is None:
+                run_start = batch
+            elif not detected and run_start is not None:
+                segments.append(self.batch_time(run_start, batch))
+                run_start = None
+        return segments
+
+    def exhaustive(self, full=True):
+        """Checks every batch in order; without full, stops after the first segment ends."""
+        labels = []
+        for batch in range(self.num_batches):
+            labels.append(self.probe(batch, batch + 1))
+            if not full and len(labels) > 1 and labels[-2] and not labels[-1]:
+                break
+        return self.segments(labels)
+
+    def coarse_to_fine(self, stride=STRIDE, full=True):
+        """Probes one window per stride batches, then bisects the windows at the edges of a detection."""
+        windows = [(first, min(first + stride, self.num_batches)) for first in range(0, self.num_batches, stride)]
+        found = []
+        for first, last in windows:
+            found.append(self.probe(first, last))
+            if not full and len(found) > 1 and found[-2] and not found[-1]:
+                break
+        windows = windows[:len(found)]
+
+        labels = [False] * windows[-1][1] if windows else []
+        for index, ((first, last), detected) in enumerate(zip(windows, found)):
+            if not detected:
+                continue
+            left_edge = index == 0 or not found[index - 1]
+            right_edge = index == len(found) - 1 or not found[index + 1]
+            self._refine(first, last, left_edge, right_edge, labels)
+        segments = self.segments(labels)
+        return segments if full else segments[:1]
+
+    def _refine(self, first, last, left_edge, right_edge, labels):
+        """
+        Labels the detected range [first, last), bisecting it towards any edge next to a non-detection.
+
+        With one edge this is a binary search with one probe per level: the
+        half away from the edge lies between detections and is assumed to be
+        detected too.
+        """
+        if last - first == 1 or not (left_edge or right_edge):
+            labels[first:last] = [True] * (last - first)
+            return
+        middle = (first + last) // 2
+        if left_edge and right_edge:
+            left = self.probe(first, middle)
+            right = self.probe(middle, last)
+            if not left and not right:
+                # The coarse probe saw it but neither half does: keep the range rather than lose it.
+                labels[first:last] = [True] * (last - first)
+                return
+        elif right_edge:
+            left, right = True, self.probe(middle, last)
+        else:
+            left, right = self.probe(first, middle), True
+        if left:
+            self._refine(first, middle, left_edge, not right, labels)
+        if right:
+            self._refine(middle, last, not left, right_edge, labels)
+
+
+def extract_frames(video, frame_dir, frame_rate=FRAME_RATE):
+    """Extracts frames at a fixed rate the same way llm-ffmpeg-edit.bash does."""
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", video, "-vf", f"fps={frame_rate}", "-q:v", "1",
+         os.path.join(frame_dir, "frame_%08d.jpg")],
+        check=True,
+    )
+    return list_frames(frame_dir)
+
+
+def overlap_seconds(a, b):
+    return sum(max(0.0, min(a_end, b_end) - max(a_start, b_start)) for a_start, a_end in a for b_start, b_end in b)
+
+
+def run_benchmark(manifest, frame_rate, frames_per_batch, stride, temperature):
+    """
+    Compares the exhaustive and coarse-to-fine searches on fixture videos.
+
+    The manifest has one "video<TAB>thing to detect" pair per line. Reports
+    vision calls, wall time and how much of the exhaustive scan's detected
+    time the coarse-to-fine search also found.
+    """
+    totals = {"exhaustive": [0, 0.0], "coarse": [0, 0.0]}
+    print(f"{'video':32} {'batches':>7} {'exh calls':>9} {'exh s':>7} {'c2f calls':>9} {'c2f s':>7} {'recall':>7} {'precision':>9}")
+    with open(manifest, "r", encoding="utf-8") as f:
+        entries = [line.rstrip("\n").split("\t", 1) for line in f if line.strip() and not line.startswith("#")]
+    for video, thing in entries:
+        with tempfile.TemporaryDirectory() as frame_dir:
+            try:
+                frames = extract_frames(video, frame_dir, frame_rate)
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"{os.path.basename(video)[:32]:32} skipped: {e}")
+                continue
+            results = {}
+            for name in totals:
+                detector = VisionDetector(thing, temperature)
+                search = FrameSearch(frames, detector, frame_rate, frames_per_batch)
+                start = time.perf_counter()
+                segments = search.exhaustive() if name == "exhaustive" else search.coarse_to_fine(stride)
+                elapsed = time.perf_counter() - start
+                totals[name][0] += detector.calls
+                totals[name][1] += elapsed
+                results[name] = (segments, detector.calls, elapsed, search.num_batches)
+
+        exact, calls, elapsed, batches = results["exhaustive"]
+        found, c2f_calls, c2f_elapsed, _ = results["coarse"]
+        exact_time = sum(end - start for start, end in exact)
+        found_time = sum(end - start for start, end in found)
+        common = overlap_seconds(exact, found)
+        recall = common / exact_time if exact_time else 1.0
+        precision = common / found_time if found_time else 1.0
+        print(f"{os.path.basename(video)[:32]:32} {batches:7d} {calls:9d} {elapsed:7.1f} {c2f_calls:9d} {c2f_elapsed:7.1f} "
+              f"{recall:7.1%} {precision:9.1%}")
+
+    if totals["exhaustive"][0]:
+        print(f"\nVision calls: exhaustive {totals['exhaustive'][0]}, coarse-to-fine {totals['coarse'][0]} "
+              f"({totals['coarse'][0] / totals['exhaustive'][0]:.0%}); wall time "
+              f"{totals['exhaustive'][1]:.1f}s vs {totals['coarse'][1]:.1f}s")
+    else:
+        print("No videos benchmarked.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the segments of a video's extracted frames where something is visible.")
+    parser.add_argument("frame_dir", nargs="?", help="Directory holding frame_XXXXXXXX.jpg files")
+    parser.add_argument("thing_to_detect", nargs="?", help="Description of what to detect")
+    parser.add_argument("--frame-rate", type=float, default=FRAME_RATE, help=f"Rate the frames were extracted at (default: {FRAME_RATE})")
+    parser.add_argument("--frames-per-batch", type=int, default=FRAMES_PER_BATCH, help=f"Frames sent per vision call (default: {FRAMES_PER_BATCH})")
+    parser.add_argument("--stride", type=int, default=STRIDE, help=f"Batches covered by each coarse probe (default: {STRIDE})")
+    parser.add_argument("--coarse-to-fine", action="store_true", help="Probe windows of --stride batches and refine only at detection edges (fewer calls; may miss short segments)")
+    parser.add_argument("--full", action="store_true", help="Report every segment instead of stopping after the first one")
+    parser.add_argument("--temperature", default=TEMPERATURE, help=f"Temperature passed to {VISION_SCRIPT} (default: {TEMPERATURE})")
+    parser.add_argument("--annotate", action="store_true", help="Tell the model which frames stand for skipped near-duplicates (after llm_frame_dedup.py)")
+    parser.add_argument("--copy-to", metavar="DIR", help="Copy every checked frame into DIR/YES or DIR/NO")
+    parser.add_argument("--benchmark", metavar="MANIFEST", help="Compare both searches on the 'video<TAB>thing' pairs in MANIFEST, then exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.frame_rate, args.frames_per_batch, args.stride, args.temperature)
+        return
+    if not args.frame_dir or not args.thing_to_detect:
+        parser.error("frame_dir and thing_to_detect are required")
+
+    frames = list_frames(args.frame_dir)
+    if not frames:
+        print(f"Error: No frames found in '{args.frame_dir}'.", file=sys.stderr)
+        sys.exit(1)
+
+    detector = VisionDetector(args.thing_to_detect, args.temperature, args.frame_dir if args.annotate else None)
+    search = FrameSearch(frames, detector, args.frame_rate, args.frames_per_batch, args.copy_to,
+                         last_frame_number(args.frame_dir, frames))
+    if args.coarse_to_fine:
+        segments = search.coarse_to_fine(max(1, args.stride), args.full)
+    else:
+        segments = search.exhaustive(args.full)
+    print(f"  {detector.calls} vision calls for {search.num_batches} batches.", file=sys.stderr)
+    for start, end in segments:
+        print(f"{start:.3f},{end:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,42 +4,48 @@ import io
 import sys
 import os
 import base64
+import json
 import argparse
-import requests
 import subprocess
 import tempfile
-from typing import List, Dict, Any, Tuple, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Tuple, Optional, Iterator, Union
 from pdfminer.layout import LTTextLine, LTTextBox, LTImage, LTFigure, LAParams, LTRect, LTCurve
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.converter import PDFPageAggregator
-from pdfminer.pdfparser import PDFParser
-from pdfminer.pdfdocument import PDFDocument
-from pdfminer.pdfpage import PDFPage
 from openai import OpenAI
 import httpx
+from llm_pdf_cache import PDFDownloadError, download_pdf, file_sha256, load_extraction, save_extraction
+from llm_pdf_batch import run_batch
+from llm_pdf_pages import count_pages, iter_pages, plan_pages, resolve_pages
 
+PRE_PROMPT = "The following is a scientific paper PDF with text and images:"
+POST_PROMPT = "Create an opinion about this paper. Make it short and concise, at most a few sentences."
+TEMPERATURE = 0.7
 
-def download_pdf(url: str) -> io.BytesIO:
-    """Downloads a PDF from the given URL."""
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return io.BytesIO(response.content)
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading PDF: {e}")
-        sys.exit(1)
+# Pages with fewer extracted characters than this are treated as scanned
+OCR_MIN_CHARS = 50
+OCR_DPI = 300
+
+# Raw bytes base64-encoded per step when streaming a request body (multiple of 3)
+B64_CHUNK_SIZE = 3 * 64 * 1024
 
+# Rough per-item cost estimates used to budget map-reduce chunks
+CHARS_PER_TOKEN = 4
+IMAGE_TOKEN_ESTIMATE = 768
+# Matches numbered section headings such as "3 Method" or "4.2. Results"
+SECTION_HEADING_RE = re.compile(r'^\s*(\d+(\.\d+)*\.?|[IVX]+\.)\s+[A-Z][^\n]{0,80}$')
 
-def extract_images_from_stream(stream: bytes) -> List[Tuple[bytes, str, int]]:
-    """Extract images from PDF bytes using pdfminer.six.
+
+def extract_images_from_pdf(pdf_path: str, pagenos: Optional[List[int]] = None) -> List[Tuple[bytes, str, int]]:
+    """Extract images from a PDF file using pdfminer.six.
     
     Returns list of tuples (image_data, mime_type, page_number).
     """
     images = []
-    pdf_file = io.BytesIO(stream)
-    
-    parser = PDFParser(pdf_file)
-    document = PDFDocument(parser)
+    pdf_file = open(pdf_path, 'rb')
     
     rsrcmgr = PDFResourceManager()
     laparams = LAParams()
@@ -53,7 +59,7 @@ def extract_images_from_stream(stream: bytes) -> List[Tuple[bytes, str, int]]:
             for child in elem:
                 find_images_recursive(child, images_list, page_num)
     
-    for page_num, page in enumerate(PDFPage.create_pages(document)):
+    for page_num, page in iter_pages(pdf_file, pagenos):
         interpreter.process_page(page)
         layout = device.get_result()
         
@@ -93,6 +99,7 @@ def extract_images_from_stream(stream: bytes) -> List[Tuple[bytes, str, int]]:
                 print(f"Warning: Could not extract image: {e}")
     
     device.close()
+    pdf_file.close()
     return images
 
 
@@ -142,7 +149,7 @@ def detect_tables_in_layout(layout) -> List[Dict[str, Any]]:
         return ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
     
     def distance(p1, p2):
-        return ((p1[0] - p2[0])**2 + **(p1[1] - p2[1])2) ** 0.5
+        return ((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2) ** 0.5
     
     def lines_to_bbox(lines_h, lines_v):
         if not lines_h and not lines_v:
@@ -358,16 +365,16 @@ def convert_page_to_image(pdf_path: str, page_num: int, dpi: int = 200) -> Optio
         
         output_prefix = tmp_path.rsplit('.', 1)[0]
         
+        # -singlefile writes exactly <prefix>.jpg; without it pdftoppm
+        # zero-pads the page suffix depending on the document's page count
         result = subprocess.run(
-            ['pdftoppm', '-jpeg', '-f', str(page_num + 1), '-l', str(page_num + 1), 
+            ['pdftoppm', '-jpeg', '-singlefile', '-f', str(page_num + 1), '-l', str(page_num + 1), 
              '-r', str(dpi), pdf_path, output_prefix],
             capture_output=True, timeout=60
         )
         
-        if result.returncode == 0:
-            jpg_path = f"{output_prefix}-{page_num + 1}.jpg"
-            if os.path.exists(jpg_path):
-                return jpg_path
+        if result.returncode == 0 and os.path.getsize(tmp_path) > 0:
+            return tmp_path
         
         os.unlink(tmp_path)
         return None
@@ -416,7 +423,7 @@ def crop_table_region(image_path: str, table_bbox: Tuple[float, float, float, fl
         return None
 
 
-def extract_tables_with_images(pdf_path: str, pdf_bytes: bytes) -> List[Dict[str, Any]]:
+def extract_tables_with_images(pdf_path: str, pagenos: Optional[List[int]] = None) -> List[Dict[str, Any]]:
     """Extract tables from PDF as images using pdfminer detection and pdftoppm rendering.
     
     Returns list of table images with metadata.
@@ -429,15 +436,14 @@ def extract_tables_with_images(pdf_path: str, pdf_bytes: bytes) -> List[Dict[str
         print("Warning: PIL not available for table extraction")
         return tables
     
-    parser = PDFParser(io.BytesIO(pdf_bytes))
-    document = PDFDocument(parser)
+    pdf_file = open(pdf_path, 'rb')
     
     rsrcmgr = PDFResourceManager()
     laparams = LAParams()
     device = PDFPageAggregator(rsrcmgr, laparams=laparams)
     interpreter = PDFPageInterpreter(rsrcmgr, device)
     
-    for page_num, page in enumerate(PDFPage.create_pages(document)):
+    for page_num, page in iter_pages(pdf_file, pagenos):
         interpreter.process_page(page)
         layout = device.get_result()
         
@@ -462,19 +468,16 @@ def extract_tables_with_images(pdf_path: str, pdf_bytes: bytes) -> List[Dict[str
                 os.unlink(image_path)
     
     device.close()
+    pdf_file.close()
     return tables
 
 
-def extract_text_and_images_with_order(pdf_file: io.BytesIO) -> List[Dict[str, Any]]:
+def extract_text_and_images_with_order(pdf_path: str, pagenos: Optional[List[int]] = None) -> List[Dict[str, Any]]:
     """Extract text and images from PDF, preserving order.
     
     Returns a list of items, each with 'type' ('text' or 'image') and 'content'.
     """
-    pdf_file.seek(0)
-    raw_bytes = pdf_file.read()
-    
-    parser = PDFParser(io.BytesIO(raw_bytes))
-    document = PDFDocument(parser)
+    pdf_file = open(pdf_path, 'rb')
     
     rsrcmgr = PDFResourceManager()
     laparams = LAParams()
@@ -499,7 +502,7 @@ def extract_text_and_images_with_order(pdf_file: io.BytesIO) -> List[Dict[str, A
             for child in elem:
                 extract_text_recursive(child, text_list)
     
-    for page_num, page in enumerate(PDFPage.create_pages(document)):
+    for page_num, page in iter_pages(pdf_file, pagenos):
         interpreter.process_page(page)
         layout = device.get_result()
         
@@ -544,6 +547,7 @@ def extract_text_and_images_with_order(pdf_file: io.BytesIO) -> List[Dict[str, A
                 items.append({
                     'type': 'text',
                     'content': item['content'],
+                    'bbox': item['bbox'],
                     'page': page_num
                 })
             else:
@@ -553,8 +557,9 @@ def extract_text_and_images_with_order(pdf_file: io.BytesIO) -> List[Dict[str, A
                 })
     
     device.close()
+    pdf_file.close()
     
-    images = extract_images_from_stream(raw_bytes)
+    images = extract_images_from_pdf(pdf_path, pagenos)
     
     image_index = 0
     final_items = []
@@ -632,6 +637,9 @@ def format_messages_for_debug(messages: List[Dict[str, Any]]) -> str:
                         if len(url) > 100:
                             url = url[:50] + "..." + url[-20:]
                         output.append(f"  [{item_idx}] image_url: {url}")
+                    elif item['type'] == 'image_blob':
+                        size_kb = len(item['data']) / 1024
+                        output.append(f"  [{item_idx}] image_url: data:{item['mime_type']};base64,<{size_kb:.1f} KB, encoded while sending>")
             else:
                 output.append(f"  {content}")
     
@@ -639,8 +647,13 @@ def format_messages_for_debug(messages: List[Dict[str, Any]]) -> str:
     return '\n'.join(output)
 
 
-def build_messages(items: List[Dict[str, Any]], pre_prompt: str, post_prompt: str) -> List[Dict[str, Any]]:
-    """Build OpenAI-compatible messages with interlaced text, images and tables."""
+def build_messages(items: List[Dict[str, Any]], pre_prompt: str, post_prompt: str,
+                   stream_images: bool = False) -> List[Dict[str, Any]]:
+    """Build OpenAI-compatible messages with interlaced text, images and tables.
+    
+    With stream_images, image parts are left as 'image_blob' references to the
+    raw bytes so iter_json_body() can base64-encode them while sending.
+    """
     user_content = []
     
     # Add pre-prompt
@@ -651,6 +664,12 @@ def build_messages(items: List[Dict[str, Any]], pre_prompt: str, post_prompt: st
     for item in items:
         if item['type'] == 'text':
             user_content.append({'type': 'text', 'text': item['content']})
+        elif item['type'] in ('image', 'table') and stream_images:
+            user_content.append({
+                'type': 'image_blob',
+                'mime_type': item['mime_type'],
+                'data': item['content']
+            })
         elif item['type'] in ('image', 'table'):
             b64_data = base64.b64encode(item['content']).decode('utf-8')
             data_url = f"data:{item['mime_type']};base64,{b64_data}"
@@ -670,59 +689,405 @@ def build_messages(items: List[Dict[str, Any]], pre_prompt: str, post_prompt: st
     ]
 
 
+def iter_json_body(value: Any, sizes_only: bool = False) -> Iterator[Union[bytes, int]]:
+    """Serialize a request payload to JSON piece by piece.
+    
+    'image_blob' parts are written as regular image_url data URLs, but their
+    base64 text is produced B64_CHUNK_SIZE bytes at a time, so the encoded
+    image never exists in memory as a whole. With sizes_only, the lengths of
+    the pieces are yielded instead, without encoding anything.
+    """
+    if isinstance(value, dict) and value.get('type') == 'image_blob':
+        prefix = ('{"type": "image_url", "image_url": {"url": "data:%s;base64,' % value['mime_type']).encode('utf-8')
+        yield len(prefix) if sizes_only else prefix
+        data = memoryview(value['data'])
+        for start in range(0, len(data), B64_CHUNK_SIZE):
+            piece = data[start:start + B64_CHUNK_SIZE]
+            yield 4 * ((len(piece) + 2) // 3) if sizes_only else base64.b64encode(piece)
+        yield 3 if sizes_only else b'"}}'
+    elif isinstance(value, dict):
+        yield 1 if sizes_only else b'{'
+        for i, (key, item) in enumerate(value.items()):
+            piece = (', ' if i else '').encode('utf-8') + json.dumps(key).encode('utf-8') + b': '
+            yield len(piece) if sizes_only else piece
+            yield from iter_json_body(item, sizes_only)
+        yield 1 if sizes_only else b'}'
+    elif isinstance(value, list):
+        yield 1 if sizes_only else b'['
+        for i, item in enumerate(value):
+            if i:
+                yield 2 if sizes_only else b', '
+            yield from iter_json_body(item, sizes_only)
+        yield 1 if sizes_only else b']'
+    else:
+        piece = json.dumps(value).encode('utf-8')
+        yield len(piece) if sizes_only else piece
+
+
+def stream_chat_completion(base_url: str, api_key: str, payload: Dict[str, Any],
+                           timeout: httpx.Timeout) -> Iterator[str]:
+    """POST a chat completion with a streamed request body and yield the reply text.
+    
+    The body is generated by iter_json_body() as it is sent, with its
+    Content-Length computed up front, so peak memory stays near the size of the
+    raw images instead of several encoded copies of them.
+    """
+    url = base_url.rstrip('/') + '/chat/completions'
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {api_key}',
+        'Content-Length': str(sum(iter_json_body(payload, sizes_only=True))),
+    }
+    
+    with httpx.stream('POST', url, content=iter_json_body(payload), headers=headers, timeout=timeout) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            choices = json.loads(data).get('choices') or []
+            if choices and (choices[0].get('delta') or {}).get('content'):
+                yield choices[0]['delta']['content']
+
+
+def estimate_item_tokens(item: Dict[str, Any]) -> int:
+    """Estimate how many prompt tokens an extracted item will cost."""
+    if item['type'] == 'text':
+        return len(item['content']) // CHARS_PER_TOKEN + 1
+    return IMAGE_TOKEN_ESTIMATE
+
+
+def is_section_heading(item: Dict[str, Any]) -> bool:
+    """Return True if a text item looks like a numbered section heading."""
+    return item['type'] == 'text' and bool(SECTION_HEADING_RE.match(item['content'].strip()))
+
+
+def chunk_items(items: List[Dict[str, Any]], max_tokens: int, max_images: int) -> List[List[Dict[str, Any]]]:
+    """Group items into chunks that fit a token and image budget.
+    
+    Items are kept in page order (tables are moved next to their page). A new
+    chunk is started when the budget would be exceeded, or at a section heading
+    once the current chunk is at least half full, so chunks tend to follow the
+    paper's structure.
+    """
+    ordered = sorted(items, key=lambda item: item['page'])
+    
+    chunks = []
+    current = []
+    current_tokens = 0
+    current_images = 0
+    
+    for item in ordered:
+        tokens = estimate_item_tokens(item)
+        is_image = item['type'] in ('image', 'table')
+        
+        over_budget = (current_tokens + tokens > max_tokens or
+                       (is_image and current_images + 1 > max_images))
+        section_break = is_section_heading(item) and current_tokens >= max_tokens // 2
+        
+        if current and (over_budget or section_break):
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+            current_images = 0
+        
+        current.append(item)
+        current_tokens += tokens
+        if is_image:
+            current_images += 1
+    
+    if current:
+        chunks.append(current)
+    
+    return chunks
+
+
+def describe_chunk(chunk: List[Dict[str, Any]]) -> str:
+    """Return a short page-range label for a chunk."""
+    first_page = chunk[0]['page'] + 1
+    last_page = chunk[-1]['page'] + 1
+    if first_page == last_page:
+        return f"page {first_page}"
+    return f"pages {first_page}-{last_page}"
+
+
+def summarize_chunk(client: OpenAI, model: str, chunk: List[Dict[str, Any]], index: int,
+                    total: int, temperature: float) -> str:
+    """Map step: ask the LLM for notes on a single chunk of the paper."""
+    pre_prompt = (f"The following is part {index + 1} of {total} ({describe_chunk(chunk)}) "
+                  "of a scientific paper PDF with text and images:")
+    post_prompt = ("Take concise notes on the key claims, methods, results and figures in this part. "
+                   "These notes will be combined with notes from the other parts of the paper.")
+    messages = build_messages(chunk, pre_prompt, post_prompt)
+    
+    completion = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=False,
+    )
+    return completion.choices[0].message.content or ""
+
+
+def build_reduce_messages(partials: List[Tuple[str, str]], post_prompt: str) -> List[Dict[str, Any]]:
+    """Build the text-only reduce request from (label, notes) pairs."""
+    user_content = [{'type': 'text', 'text': "The following are notes taken from consecutive parts of a scientific paper:"}]
+    for label, notes in partials:
+        user_content.append({'type': 'text', 'text': f"Notes for {label}:\n{notes}"})
+    user_content.append({'type': 'text', 'text': post_prompt})
+    
+    return [
+        {'role': 'system', 'content': 'You are a sophisticated technical paper examiner.'},
+        {'role': 'user', 'content': user_content}
+    ]
+
+
+def map_reduce(client: OpenAI, model: str, chunks: List[List[Dict[str, Any]]], post_prompt: str,
+               temperature: float, workers: int, debug: bool = False):
+    """Summarize chunks concurrently, then combine the notes with a final reduce call.
+    
+    Returns the streamed completion of the reduce call.
+    """
+    total = len(chunks)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(summarize_chunk, client, model, chunk, i, total, temperature)
+            for i, chunk in enumerate(chunks)
+        ]
+        partials = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                notes = future.result()
+            except Exception as e:
+                print(f"Warning: Map request for {describe_chunk(chunk)} failed: {e}")
+                continue
+            if debug:
+                print(f"\n--- Notes for {describe_chunk(chunk)} ---\n{notes}")
+            partials.append((describe_chunk(chunk), notes))
+    
+    if not partials:
+        raise RuntimeError("All map requests failed")
+    
+    return client.chat.completions.create(
+        model=model,
+        messages=build_reduce_messages(partials, post_prompt),
+        temperature=temperature,
+        stream=True,
+    )
+
+
+def find_pages_without_text(items: List[Dict[str, Any]], pagenos: List[int],
+                            min_chars: int = OCR_MIN_CHARS) -> List[int]:
+    """Return the pages whose extracted text layer has fewer than min_chars characters."""
+    chars = {pageno: 0 for pageno in pagenos}
+    for item in items:
+        if item['type'] == 'text' and item['page'] in chars:
+            chars[item['page']] += len(item['content'].strip())
+    return [pageno for pageno, count in chars.items() if count < min_chars]
+
+
+def ocr_page(pdf_path: str, page_num: int, lang: str = 'eng', dpi: int = OCR_DPI) -> Optional[Dict[str, Any]]:
+    """Render a page with pdftoppm and OCR it with tesseract.
+    
+    Returns a dict with 'text', 'confidence' (mean word confidence, 0-100) and
+    the rendered 'image' bytes, or None if rendering or OCR failed.
+    """
+    image_path = convert_page_to_image(pdf_path, page_num, dpi=dpi)
+    if not image_path:
+        return None
+    
+    try:
+        # One thread per tesseract process; parallelism comes from the worker pool
+        env = dict(os.environ, OMP_THREAD_LIMIT='1')
+        result = subprocess.run(
+            ['tesseract', image_path, 'stdout', '-l', lang, 'tsv'],
+            capture_output=True, timeout=300, env=env
+        )
+        if result.returncode != 0:
+            print(f"Warning: tesseract failed on page {page_num + 1}: {result.stderr.decode('utf-8', errors='replace').strip()}")
+            return None
+        
+        lines = {}
+        confidences = []
+        for row in result.stdout.decode('utf-8', errors='replace').splitlines()[1:]:
+            fields = row.split('\t')
+            if len(fields) < 12 or not fields[11].strip():
+                continue
+            try:
+                conf = float(fields[10])
+            except ValueError:
+                continue
+            if conf < 0:
+                continue
+            key = (int(fields[2]), int(fields[3]), int(fields[4]))
+            lines.setdefault(key, []).append(fields[11])
+            confidences.append(conf)
+        
+        with open(image_path, 'rb') as f:
+            image_bytes = f.read()
+        
+        return {
+            'text': '\n'.join(' '.join(words) for _, words in sorted(lines.items())),
+            'confidence': sum(confidences) / len(confidences) if confidences else 0.0,
+            'image': image_bytes,
+        }
+    except FileNotFoundError:
+        print("Warning: 'tesseract' not found; skipping OCR.")
+        return None
+    except subprocess.TimeoutExpired:
+        print(f"Warning: tesseract timed out on page {page_num + 1}")
+        return None
+    finally:
+        os.unlink(image_path)
+
+
+def apply_ocr(pdf_path: str, items: List[Dict[str, Any]], pagenos: List[int], workers: int,
+              min_confidence: float, lang: str = 'eng', debug: bool = False) -> List[Dict[str, Any]]:
+    """OCR pages that have no text layer and merge the results into items.
+    
+    Confident OCR text replaces everything extracted from the page (usually
+    just the scan image), since text is far cheaper for the LLM than a
+    full-page image. Otherwise the page's images are kept, and if there were
+    none the rendered page is added as an image.
+    """
+    scanned = find_pages_without_text(items, pagenos)
+    if not scanned:
+        return items
+    if debug:
+        print(f"\nOCR: {len(scanned)} pages without a text layer")
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(scanned, executor.map(lambda pageno: ocr_page(pdf_path, pageno, lang), scanned)))
+    
+    replaced = set()
+    added = []
+    for pageno, result in results.items():
+        if result is None:
+            continue
+        if result['text'].strip() and result['confidence'] >= min_confidence:
+            replaced.add(pageno)
+            added.append({'type': 'text', 'content': result['text'] + '\n', 'page': pageno, 'ocr': True})
+        elif not any(item['page'] == pageno and item['type'] == 'image' for item in items):
+            added.append({'type': 'image', 'content': result['image'], 'mime_type': 'image/jpeg', 'page': pageno})
+        if debug:
+            print(f"  page {pageno + 1}: confidence {result['confidence']:.0f}, "
+                  f"{'sent as text' if pageno in replaced else 'sent as image'}")
+    
+    merged = [item for item in items if item['page'] not in replaced] + added
+    merged.sort(key=lambda item: item['page'])
+    return merged
+
+
+def extract_items(pdf_path: str, extract_tables: bool = False, debug: bool = False,
+                  use_cache: bool = True, pages: Optional[str] = None, ocr: bool = False,
+                  ocr_workers: int = os.cpu_count() or 1, ocr_min_confidence: float = 80.0,
+                  ocr_lang: str = 'eng') -> List[Dict[str, Any]]:
+    """Extract the ordered text/image items, plus table crops if requested.
+    
+    pages is an optional 1-based page spec such as "1-3,7"; only those pages
+    are laid out. With ocr, pages without a text layer are OCRed with
+    tesseract. Results are cached on disk by PDF content hash and extraction
+    settings, so repeat runs on the same paper skip layout analysis.
+    """
+    pagenos = resolve_pages(pdf_path, pages)
+    settings = {'extract_tables': extract_tables, 'pages': pagenos}
+    if ocr:
+        settings.update({'ocr': True, 'ocr_min_confidence': ocr_min_confidence, 'ocr_lang': ocr_lang})
+    if use_cache:
+        pdf_sha256 = file_sha256(pdf_path)
+        items = load_extraction(pdf_sha256, settings)
+        if items is not None:
+            if debug:
+                print(f"\nLoaded {len(items)} items from extraction cache")
+            return items
+    
+    items = extract_text_and_images_with_order(pdf_path, pagenos)
+    
+    if ocr:
+        ocr_pages = pagenos if pagenos is not None else list(range(count_pages(pdf_path)))
+        items = apply_ocr(pdf_path, items, ocr_pages, ocr_workers, ocr_min_confidence, ocr_lang, debug)
+    
+    if extract_tables:
+        table_images = extract_tables_with_images(pdf_path, pagenos)
+        if debug:
+            print(f"\nExtracted {len(table_images)} table images")
+        
+        for table_img in table_images:
+            items.append({
+                'type': 'table',
+                'content': table_img['content'],
+                'mime_type': table_img['mime_type'],
+                'page': table_img['page']
+            })
+    
+    if use_cache:
+        save_extraction(pdf_sha256, settings, items)
+    
+    return items
+
+
 def main():
     """Downloads a PDF, extracts text and images, and sends to multimodal LLM."""
     
     parser = argparse.ArgumentParser(description='Process PDF with multimodal LLM')
-    parser.add_argument('pdf_url', help='URL to the PDF file')
+    parser.add_argument('pdf_url', nargs='?', help='URL (or local path) to the PDF file')
     parser.add_argument('--debug', action='store_true', help='Show context being sent to LLM')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be sent to LLM without sending')
     parser.add_argument('--base-url', default="http://localhost:1234", help='Base URL for the LLM API (default: http://localhost:1234)')
     parser.add_argument('--api-key', default="none", help='API key for the LLM (default: none)')
     parser.add_argument('--model', default="qwen3.5", help='Model name to use (default: qwen3.5)')
     parser.add_argument('--extract-tables', action='store_true', help='Detect and extract tables as images')
+    parser.add_argument('--map-reduce', action='store_true', help='Split long papers into chunks, summarize them concurrently and combine the results')
+    parser.add_argument('--chunk-tokens', type=int, default=8000, help='Approximate token budget per map-reduce chunk (default: 8000)')
+    parser.add_argument('--chunk-images', type=int, default=8, help='Maximum images/tables per map-reduce chunk (default: 8)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent map requests in map-reduce mode (default: 4)')
+    parser.add_argument('--stream-body', action='store_true', help='Stream the request body, base64-encoding images while sending, to bound memory on image-heavy PDFs')
+    parser.add_argument('--pages', help='Only read these 1-based pages, e.g. 1-3,7,10-')
+    parser.add_argument('--outline-first', action='store_true', help='Let the LLM pick the needed pages from the outline and first pages (single PDF only)')
+    parser.add_argument('--ocr', action='store_true', help='OCR pages without a text layer with tesseract')
+    parser.add_argument('--ocr-workers', type=int, default=os.cpu_count() or 1, help='Concurrent tesseract processes (default: CPU count)')
+    parser.add_argument('--ocr-min-confidence', type=float, default=80.0, help='Mean word confidence (0-100) needed to send an OCRed page as text instead of an image (default: 80)')
+    parser.add_argument('--ocr-lang', default='eng', help='Tesseract language (default: eng)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore the extraction cache and re-run layout analysis')
+    parser.add_argument('--batch', metavar='SOURCE', help='Process every PDF in a directory, or every path/URL in a manifest file')
+    parser.add_argument('--output', default='llm-pdf-multimodal-results.jsonl', help='JSONL results file for --batch, also used to resume (default: llm-pdf-multimodal-results.jsonl)')
+    parser.add_argument('--extract-workers', type=int, default=os.cpu_count() or 1, help='Extraction processes for --batch (default: CPU count)')
+    parser.add_argument('--llm-workers', type=int, default=2, help='Concurrent LLM requests for --batch (default: 2)')
     args = parser.parse_args()
     
-    pre_prompt = "The following is a scientific paper PDF with text and images:"
-    post_prompt = "Create an opinion about this paper. Make it short and concise, at most a few sentences."
-    temperature = 0.7
-    
-    pdf_file = download_pdf(args.pdf_url)
-    raw_bytes = pdf_file.read()
+    if not args.pdf_url and not args.batch:
+        parser.error('a PDF URL or --batch is required')
     
-    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-        tmp.write(raw_bytes)
-        tmp_pdf_path = tmp.name
+    pre_prompt = PRE_PROMPT
+    post_prompt = POST_PROMPT
+    temperature = TEMPERATURE
     
-    try:
-        items = extract_text_and_images_with_order(io.BytesIO(raw_bytes))
+    if args.batch:
+        client = OpenAI(base_url=args.base_url, api_key=args.api_key, timeout=httpx.Timeout(3600))
         
-        if args.extract_tables:
-            table_images = extract_tables_with_images(tmp_pdf_path, raw_bytes)
-            if args.debug:
-                print(f"\nExtracted {len(table_images)} table images")
-            
-            for table_img in table_images:
-                items.append({
-                    'type': 'table',
-                    'content': table_img['content'],
-                    'mime_type': table_img['mime_type'],
-                    'page': table_img['page']
-                })
-    finally:
-        os.unlink(tmp_pdf_path)
-    
-    if not items:
-        print("Warning: No text or images extracted from PDF.")
-        sys.exit(0)
-    
-    # Build messages
-    messages = build_messages(items, pre_prompt, post_prompt)
-    
-    if args.debug or args.dry_run:
-        print(format_content_for_debug(items))
-        print(format_messages_for_debug(messages))
-        print()
+        def ask(items):
+            if not items:
+                raise ValueError("No text or images extracted from PDF")
+            if args.map_reduce:
+                chunks = chunk_items(items, args.chunk_tokens, args.chunk_images)
+                completion = map_reduce(client, args.model, chunks, post_prompt, temperature, args.workers)
+                return ''.join(chunk.choices[0].delta.content or '' for chunk in completion if chunk.choices)
+            completion = client.chat.completions.create(
+                model=args.model,
+                messages=build_messages(items, pre_prompt, post_prompt),
+                temperature=temperature,
+                stream=False,
+            )
+            return completion.choices[0].message.content
+        
+        extract = partial(extract_items, extract_tables=args.extract_tables, use_cache=not args.no_cache,
+                          pages=args.pages, ocr=args.ocr, ocr_workers=args.ocr_workers,
+                          ocr_min_confidence=args.ocr_min_confidence, ocr_lang=args.ocr_lang)
+        run_batch(args.batch, extract, ask, args.output,
+                  extract_workers=args.extract_workers, llm_workers=args.llm_workers)
+        return
     
     # OpenAI setup - using the new endpoint
     client = OpenAI(
@@ -731,17 +1096,81 @@ def main():
         timeout=httpx.Timeout(3600)
     )
     
+    # The cached file is shared by pdfminer and pdftoppm; no temp copy needed
+    try:
+        pdf_path = download_pdf(args.pdf_url)
+    except PDFDownloadError as e:
+        print(e)
+        sys.exit(1)
+    
+    pages = args.pages
+    if args.outline_first and not pages:
+        try:
+            pages = plan_pages(client, args.model, pdf_path, post_prompt)
+        except Exception as e:
+            print(f"Warning: Page planning failed ({e}); reading all pages.")
+        if pages:
+            print(f"Reading pages {pages}")
+    
+    try:
+        items = extract_items(pdf_path, args.extract_tables, args.debug,
+                              use_cache=not args.no_cache, pages=pages, ocr=args.ocr,
+                              ocr_workers=args.ocr_workers, ocr_min_confidence=args.ocr_min_confidence,
+                              ocr_lang=args.ocr_lang)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    if not items:
+        print("Warning: No text or images extracted from PDF.")
+        sys.exit(0)
+    
+    if args.map_reduce:
+        chunks = chunk_items(items, args.chunk_tokens, args.chunk_images)
+        if args.debug or args.dry_run:
+            print(format_content_for_debug(items))
+            print(f"\nMap-reduce: {len(chunks)} chunks")
+            for i, chunk in enumerate(chunks):
+                tokens = sum(estimate_item_tokens(item) for item in chunk)
+                images = sum(1 for item in chunk if item['type'] in ('image', 'table'))
+                print(f"  [{i}] {describe_chunk(chunk)}: {len(chunk)} items, ~{tokens} tokens, {images} images")
+            print()
+    else:
+        # Build messages
+        messages = build_messages(items, pre_prompt, post_prompt, stream_images=args.stream_body)
+        
+        if args.debug or args.dry_run:
+            print(format_content_for_debug(items))
+            print(format_messages_for_debug(messages))
+            print()
+    
     if args.dry_run:
         print(f"Dry run complete. Would have sent to: {client.base_url}")
         sys.exit(0)
     
     try:
-        completion = client.chat.completions.create(
-            model=args.model,
-            messages=messages,
-            temperature=temperature,
-            stream=True,
-        )
+        if args.stream_body and not args.map_reduce:
+            payload = {
+                'model': args.model,
+                'messages': messages,
+                'temperature': temperature,
+                'stream': True,
+            }
+            for text in stream_chat_completion(args.base_url, args.api_key, payload, httpx.Timeout(3600)):
+                print(text, end="", flush=True)
+            print('\n')
+            return
+        
+        if args.map_reduce:
+            completion = map_reduce(client, args.model, chunks, post_prompt, temperature,
+                                    args.workers, debug=args.debug)
+        else:
+            completion = client.chat.completions.create(
+                model=args.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+            )
         
         for chunk in completion:
             if chunk.choices[0].delta.content:
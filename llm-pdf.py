@@ -1,39 +1,41 @@
 #!/usr/bin/env python3
 
 import io
+import os
 import sys
-import requests
+import time
+import argparse
+import subprocess
+from collections import Counter
+from functools import partial
 from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
-from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.pdfpage import PDFPage
-from pdfminer.pdfparser import PDFParser
 from openai import OpenAI
 import httpx
+from llm_pdf_cache import PDFDownloadError, download_pdf
+from llm_pdf_batch import iter_pdf_sources, run_batch
+from llm_pdf_pages import count_pages, iter_pages, plan_pages, resolve_pages
 
-def download_pdf(url):
-    """Downloads a PDF from the given URL."""
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        return io.BytesIO(response.content)
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading PDF: {e}")
-        sys.exit(1)
+MODEL = "gemma-3-4b-it-q8_0"
+SYSTEM_PROMPT = "You are a sophistocated technical paper examiner."  # Replace with your system prompt
+PRE_PROMPT = "The following is a scientific paper PDF we converted to text:"  # Replace with your pre-prompt
+POST_PROMPT = "What is the main novel finding of this paper?  Output only the novel finding with no preamble or explanation."  # Replace with your post-prompt
+TEMPERATURE = 0.7  # Replace with your desired temperature
+BENCHMARK_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pdf")
+
+def extract_text_from_pdf(pdf_file, pagenos=None):
+    """Extracts text from a PDF file using pdfminer.six.
 
-def extract_text_from_pdf(pdf_file):
-    """Extracts text from a PDF file using pdfminer.six."""
+    If pagenos (0-based) is given, only those pages are laid out.
+    """
     resource_manager = PDFResourceManager()
     output_string = io.StringIO()
     laparams = LAParams()
     converter = TextConverter(resource_manager, output_string, laparams=laparams)
     page_interpreter = PDFPageInterpreter(resource_manager, converter)
 
-    parser = PDFParser(pdf_file)
-    document = PDFDocument(parser)
-
-    for page in PDFPage.create_pages(document):
+    for _, page in iter_pages(pdf_file, pagenos):
         page_interpreter.process_page(page)
 
     text = output_string.getvalue()
@@ -42,37 +44,237 @@ def extract_text_from_pdf(pdf_file):
     output_string.close()
     return text
 
+def extract_text_pdfminer(pdf_path, pagenos=None):
+    """Extraction backend using pdfminer.six (slow, but handles odd encodings)."""
+    with open(pdf_path, "rb") as pdf_file:
+        return extract_text_from_pdf(pdf_file, pagenos)
+
+def page_runs(pagenos):
+    """Groups sorted 0-based page numbers into contiguous (first, last) runs."""
+    runs = []
+    for pageno in sorted(pagenos):
+        if runs and pageno == runs[-1][1] + 1:
+            runs[-1][1] = pageno
+        else:
+            runs.append([pageno, pageno])
+    return runs
+
+def extract_text_pdftotext(pdf_path, pagenos=None):
+    """Extraction backend using poppler's pdftotext (fast path).
+
+    Raises RuntimeError if pdftotext is missing or fails.
+    """
+    if pagenos is None:
+        ranges = [[]]
+    else:
+        ranges = [["-f", str(first + 1), "-l", str(last + 1)] for first, last in page_runs(pagenos)]
+
+    texts = []
+    for page_range in ranges:
+        try:
+            result = subprocess.run(
+                ["pdftotext", "-enc", "UTF-8", *page_range, pdf_path, "-"],
+                capture_output=True, timeout=300,
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            raise RuntimeError(f"pdftotext unavailable: {e}")
+        if result.returncode != 0:
+            raise RuntimeError(f"pdftotext failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        texts.append(result.stdout.decode("utf-8", errors="replace"))
+    return "".join(texts)
+
+def text_looks_garbled(text, page_count):
+    """Returns True if extracted text is too sparse or full of undecodable glyphs."""
+    stripped = "".join(text.split())
+    if len(stripped) < 20 * max(page_count, 1):
+        return True
+    bad = stripped.count("\ufffd") + stripped.count("(cid:")
+    bad += sum(1 for ch in stripped if ord(ch) < 32 and ch != "\f")
+    return bad / len(stripped) > 0.05
+
+def extract_text_auto(pdf_path, pagenos=None):
+    """Tries pdftotext first and falls back to pdfminer if it fails or looks garbled."""
+    try:
+        text = extract_text_pdftotext(pdf_path, pagenos)
+        page_count = len(pagenos) if pagenos is not None else count_pages(pdf_path)
+        if not text_looks_garbled(text, page_count):
+            return text
+    except RuntimeError as e:
+        print(f"Warning: {e}; falling back to pdfminer.", file=sys.stderr)
+    return extract_text_pdfminer(pdf_path, pagenos)
+
+BACKENDS = {
+    "auto": extract_text_auto,
+    "pdftotext": extract_text_pdftotext,
+    "pdfminer": extract_text_pdfminer,
+}
+
+def extract_text_from_path(pdf_path, pages=None, backend="auto"):
+    """Extracts text from the PDF file at the given path.
+
+    pages is an optional 1-based page spec such as "1-3,7"; backend is one of BACKENDS.
+    """
+    pagenos = resolve_pages(pdf_path, pages)
+    return BACKENDS[backend](pdf_path, pagenos)
+
+def word_overlap(reference, candidate, n=1):
+    """Returns the fraction of reference word n-grams (with multiplicity) found in candidate.
+
+    With n=2 the score also drops when words come out in the wrong order,
+    e.g. when two columns are interleaved.
+    """
+    def ngrams(text):
+        words = text.split()
+        return Counter(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+    reference_grams = ngrams(reference)
+    candidate_grams = ngrams(candidate)
+    total = sum(reference_grams.values())
+    if not total:
+        return 1.0 if not candidate_grams else 0.0
+    return sum((reference_grams & candidate_grams).values()) / total
+
+def expected_text(entry):
+    """Returns the expected text stored next to a local PDF as <name>.txt, or None."""
+    path = os.path.splitext(entry)[0] + ".txt"
+    if not os.path.isfile(entry) or not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def run_benchmark(source=BENCHMARK_FIXTURES):
+    """Compares pdftotext and pdfminer throughput and output fidelity on a PDF corpus.
+
+    Fidelity is measured against the expected text stored next to each PDF as
+    <name>.txt: "words" is the fraction of expected words found, "order" the
+    fraction of expected word pairs, which also catches wrong reading order.
+    PDFs without expected text are scored against pdfminer's output instead
+    (marked "vs pdfminer"). Entries that cannot be downloaded or read are
+    skipped.
+    """
+    # backend -> [pages, seconds, [(words, order), ...]]
+    totals = {"pdftotext": [0, 0.0, []], "pdfminer": [0, 0.0, []]}
+    benchmarked = 0
+    print(f"{'file':32} {'pages':>5} {'pdftotext s':>11} {'words':>6} {'order':>6} "
+          f"{'pdfminer s':>10} {'words':>6} {'order':>6}")
+    for entry in iter_pdf_sources(source):
+        name = os.path.basename(entry)[:32]
+        try:
+            pdf_path = download_pdf(entry)
+            pages = count_pages(pdf_path)
+            start = time.perf_counter()
+            texts = {"pdfminer": extract_text_pdfminer(pdf_path)}
+            times = {"pdfminer": time.perf_counter() - start}
+        except Exception as e:
+            print(f"{name:32} skipped: {e}")
+            continue
+        start = time.perf_counter()
+        try:
+            texts["pdftotext"] = extract_text_pdftotext(pdf_path)
+            times["pdftotext"] = time.perf_counter() - start
+        except RuntimeError as e:
+            print(f"{name:32} pdftotext skipped: {e}")
+
+        reference = expected_text(entry)
+        note = ""
+        if reference is None:
+            reference, note = texts["pdfminer"], " vs pdfminer"
+        benchmarked += 1
+        columns = []
+        for backend, width in (("pdftotext", 11), ("pdfminer", 10)):
+            if backend not in texts:
+                columns.append(f"{'-':>{width}} {'-':>6} {'-':>6}")
+                continue
+            words = word_overlap(reference, texts[backend])
+            order = word_overlap(reference, texts[backend], 2)
+            totals[backend][0] += pages
+            totals[backend][1] += times[backend]
+            totals[backend][2].append((words, order))
+            columns.append(f"{times[backend]:{width}.3f} {words:6.1%} {order:6.1%}")
+        garbled = " garbled" if "pdftotext" in texts and text_looks_garbled(texts["pdftotext"], pages) else ""
+        print(f"{name:32} {pages:5d} {' '.join(columns)}{note}{garbled}")
+
+    if not benchmarked:
+        print("No PDFs benchmarked.")
+        return
+    print(f"\nTotal over {benchmarked} PDFs:")
+    for backend, (pages, seconds, results) in totals.items():
+        if not results:
+            print(f"  {backend:10} not run")
+            continue
+        print(f"  {backend:10} {pages / max(seconds, 1e-9):8.1f} pages/s, "
+              f"words {sum(w for w, _ in results) / len(results):.1%}, "
+              f"order {sum(o for _, o in results) / len(results):.1%}")
+
+def create_completion(client, pdf_text, stream):
+    """Sends the extracted text to the LLM with the configured prompts."""
+    return client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": PRE_PROMPT},
+            {"role": "user", "content": pdf_text},
+            {"role": "user", "content": POST_PROMPT},
+        ],
+        temperature=TEMPERATURE,
+        stream=stream,
+    )
+
 def main():
     """Downloads a PDF, extracts text, and sends it to an LLM."""
 
-    if len(sys.argv) < 2:
-        print("Usage: llm-pdf.py <pdf_url>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Extract text from a PDF and send it to an LLM.")
+    parser.add_argument("pdf_url", nargs="?", help="URL or local path of the PDF file")
+    parser.add_argument("--pages", help="Only read these 1-based pages, e.g. 1-3,7,10-")
+    parser.add_argument("--outline-first", action="store_true", help="Let the LLM pick the needed pages from the outline and first pages (single PDF only)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="auto", help="Text extraction backend; auto uses pdftotext and falls back to pdfminer (default: auto)")
+    parser.add_argument("--benchmark", metavar="SOURCE", nargs="?", const=BENCHMARK_FIXTURES, help="Compare backend speed and output fidelity on a directory or manifest of PDFs (default: the bundled fixtures/pdf), then exit")
+    parser.add_argument("--batch", metavar="SOURCE", help="Process every PDF in a directory, or every path/URL in a manifest file")
+    parser.add_argument("--output", default="llm-pdf-results.jsonl", help="JSONL results file for --batch, also used to resume (default: llm-pdf-results.jsonl)")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1, help="Extraction processes for --batch (default: CPU count)")
+    parser.add_argument("--llm-workers", type=int, default=2, help="Concurrent LLM requests for --batch (default: 2)")
+    args = parser.parse_args()
 
-    pdf_url = sys.argv[1]
-    system_prompt = "You are a sophistocated technical paper examiner."  # Replace with your system prompt
-    pre_prompt = "The following is a scientific paper PDF we converted to text:"  # Replace with your pre-prompt
-    post_prompt = "What is the main novel finding of this paper?  Output only the novel finding with no preamble or explanation."  # Replace with your post-prompt
-    temperature = 0.7  # Replace with your desired temperature
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+        return
 
-    pdf_file = download_pdf(pdf_url)
-    pdf_text = extract_text_from_pdf(pdf_file)
+    if not args.pdf_url and not args.batch:
+        parser.error("a PDF URL or --batch is required")
 
     # OpenAI setup
     client = OpenAI(base_url="http://localhost:9090/v1", api_key="none", timeout=httpx.Timeout(3600))
 
+    if args.batch:
+        def ask(pdf_text):
+            return create_completion(client, pdf_text, stream=False).choices[0].message.content
+
+        run_batch(args.batch, partial(extract_text_from_path, pages=args.pages, backend=args.backend), ask, args.output,
+                  extract_workers=args.extract_workers, llm_workers=args.llm_workers)
+        return
+
+    try:
+        pdf_path = download_pdf(args.pdf_url)
+    except PDFDownloadError as e:
+        print(e)
+        sys.exit(1)
+
+    pages = args.pages
+    if args.outline_first and not pages:
+        try:
+            pages = plan_pages(client, MODEL, pdf_path, POST_PROMPT)
+        except Exception as e:
+            print(f"Warning: Page planning failed ({e}); reading all pages.", file=sys.stderr)
+        if pages:
+            print(f"Reading pages {pages}", file=sys.stderr)
+
+    try:
+        pdf_text = extract_text_from_path(pdf_path, pages, args.backend)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     try:
-        completion = client.chat.completions.create(
-            model="gemma-3-4b-it-q8_0",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": pre_prompt},
-                {"role": "user", "content": pdf_text},
-                {"role": "user", "content": post_prompt},
-            ],
-            temperature=temperature,
-            stream=True,
-        )
+        completion = create_completion(client, pdf_text, stream=True)
 
         for chunk in completion:
             if chunk.choices[0].delta.content:
@@ -4,6 +4,7 @@ import re
 import sys # Added for command-line arguments
 from openai import OpenAI 
 import httpx # Added for httpx.Timeout
+from llm_http_cache import fetch
 
 def fetch_and_clean_html(url):
     """
@@ -11,8 +12,7 @@ def fetch_and_clean_html(url):
     and returns the prettified HTML content as a string.
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+        response = fetch(url)  # Cached; raises an HTTPError for bad responses (4xx or 5xx)
         html_content = response.text
 
         soup = BeautifulSoup(html_content, 'html.parser')
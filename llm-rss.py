@@ -1,19 +1,30 @@
 #!/usr/bin/env python3
 """
-Simple RSS fetcher and parser for the CBS News Technology feed.
+Simple RSS fetcher and parser, by default for the CBS News Technology feed.
 
 This script downloads the RSS XML from the given URL, parses the
 channel and its items, and prints a short summary of each article.
+With several --feed URLs (or a --feeds file) the feeds are polled
+concurrently, and stories with the same normalized link or near-duplicate
+text are collapsed before anything is sent to the LLM.
+
+Requires: requests, httpx, openai, python-dotenv, pyttsx3 and lxml
+(pip install requests httpx openai python-dotenv pyttsx3 lxml).
 """
 
-import urllib.request
+import hashlib
+import urllib.parse
 import xml.etree.ElementTree as ET
 import json
 import logging
 import re
 import signal
+import sqlite3
 import sys
-from bs4 import BeautifulSoup
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 # Set httpx logging to WARNING level to suppress INFO level logs
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -30,8 +41,33 @@ load_dotenv()
 backend_host = os.getenv("LLM_BACKEND_HOST", "localhost")
 backend_port = os.getenv("LLM_BACKEND_PORT", "8000")
 from typing import List, Dict
+from llm_host_scheduler import HostScheduler
+from llm_html_extract import extract
 
 logger = logging.getLogger(__name__)
+# Feed and article downloads share per-host politeness limits
+scheduler = HostScheduler()
+
+SAVE_DB = "llm-rss.db"
+# Plain-text list of processed URLs used by --save before SAVE_DB
+LEGACY_SAVE_FILE = "llm-rss-output.txt"
+DEFAULT_FEED = "https://www.cbsnews.com/latest/rss/technology"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+# Query parameters dropped by normalize_url (utm_* is always dropped)
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ftag", "cmpid", "taid", "ocid", "cmp"}
+# Stories whose title+description word sets have at least this (MinHash
+# estimated) Jaccard similarity are collapsed into one
+DUPLICATE_SIMILARITY = 0.6
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(0x5EED)
+MINHASH_PARAMS = [
+    (_minhash_rng.randrange(1, MINHASH_PRIME), _minhash_rng.randrange(MINHASH_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+# Number of best remaining articles re-ranked together with newly arrived ones
+RERANK_CONTEXT = 5
 
 # Global flag to track shutdown request
 shutdown_requested = False
@@ -39,7 +75,7 @@ shutdown_requested = False
 
 def fetch_cbs_rss(url: str) -> bytes:
     """
-    Retrieve the raw RSS XML from the specified URL.
+    Retrieve the raw RSS (or Atom) XML from the specified URL.
 
     Args:
         url: The RSS feed URL.
@@ -47,8 +83,9 @@ def fetch_cbs_rss(url: str) -> bytes:
     Returns:
         The raw bytes of the RSS XML.
     """
-    with urllib.request.urlopen(url) as response:
-        return response.read()
+    # Goes through the shared HTTP cache, so unchanged feeds are revalidated
+    # with ETag/If-Modified-Since instead of being downloaded again.
+    return scheduler.fetch(url, timeout=30).content
 
 
 def parse_cbs_rss(xml_data: bytes) -> List[Dict[str, str | None]]:
@@ -63,6 +100,8 @@ def parse_cbs_rss(xml_data: bytes) -> List[Dict[str, str | None]]:
         description, and pubDate for an article.
     """
     root = ET.fromstring(xml_data)
+    if root.tag == f"{{{ATOM_NS}}}feed":
+        return parse_atom(root)
     channel = root.find("channel")
     if channel is None:
         raise ValueError("No <channel> element found in RSS feed")
@@ -91,14 +130,147 @@ def parse_cbs_rss(xml_data: bytes) -> List[Dict[str, str | None]]:
         )
     return items
 
+def parse_atom(root: ET.Element) -> List[Dict[str, str | None]]:
+    """Extract the same article fields as parse_cbs_rss from an Atom feed."""
+    ns = {"atom": ATOM_NS}
+    items: List[Dict[str, str | None]] = []
+    for entry in root.findall("atom:entry", ns):
+        link = "No link"
+        for link_element in entry.findall("atom:link", ns):
+            if link_element.get("rel", "alternate") == "alternate" and link_element.get("href"):
+                link = link_element.get("href")
+                break
+        items.append(
+            {
+                "title": entry.findtext("atom:title", default="No title", namespaces=ns),
+                "link": link,
+                "description": entry.findtext("atom:summary", default=None, namespaces=ns)
+                or entry.findtext("atom:content", default="No description", namespaces=ns),
+                "pubDate": entry.findtext("atom:updated", default="No publication date", namespaces=ns),
+                "image_url": None,
+            }
+        )
+    return items
+
+
+def normalize_url(url: str) -> str:
+    """
+    Return a canonical form of an article URL so the same story linked from
+    several feeds compares equal: lower-case scheme and host, no fragment,
+    no tracking parameters, sorted query, no trailing slash.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    if not parts.scheme or not parts.netloc:
+        return url
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, urllib.parse.urlencode(query), "")
+    )
+
+
+def minhash(text: str) -> tuple:
+    """MinHash signature of the set of words in *text* (HTML tags ignored)."""
+    words = set(re.findall(r"\w+", re.sub(r"<[^>]+>", " ", text).lower()))
+    if not words:
+        return ()
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big") for word in words]
+    return tuple(min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_PARAMS)
+
+
+def collapse_near_duplicates(
+    articles: List[Dict[str, str | None]],
+    known: List[Dict[str, str | None]] = (),
+) -> List[Dict[str, str | None]]:
+    """
+    Drop articles whose normalized link ("key") matches, or whose
+    title+description is a near duplicate of, an earlier article or one in
+    *known*.
+
+    Near duplicates have an estimated word Jaccard similarity of at least
+    DUPLICATE_SIMILARITY. Signatures are bucketed by MINHASH_BANDS bands
+    (locality-sensitive hashing), so only stories sharing a band are compared
+    instead of every pair.
+    """
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    seen_keys = set()
+    buckets: Dict[tuple, List[tuple]] = {}
+    unique: List[Dict[str, str | None]] = []
+
+    def band_keys(signature: tuple):
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(MINHASH_BANDS)]
+
+    def is_duplicate(signature: tuple) -> bool:
+        for key in band_keys(signature):
+            for other in buckets.get(key, ()):
+                matches = sum(1 for x, y in zip(signature, other) if x == y)
+                if matches / MINHASH_PERMUTATIONS >= DUPLICATE_SIMILARITY:
+                    return True
+        return False
+
+    def add(signature: tuple) -> None:
+        for key in band_keys(signature):
+            buckets.setdefault(key, []).append(signature)
+
+    for article in known:
+        seen_keys.add(article.get("key"))
+        signature = minhash(f"{article.get('title') or ''} {article.get('description') or ''}")
+        if signature:
+            add(signature)
+
+    for article in articles:
+        signature = minhash(f"{article.get('title') or ''} {article.get('description') or ''}")
+        if article.get("key") in seen_keys or (signature and is_duplicate(signature)):
+            logger.debug(f"Collapsing duplicate story: {article.get('title')}")
+            continue
+        seen_keys.add(article.get("key"))
+        if signature:
+            add(signature)
+        unique.append(article)
+    return unique
+
+
+def fetch_feeds(feed_urls: List[str]) -> List[Dict[str, str | None]]:
+    """
+    Poll every feed concurrently and return their articles with
+    near-duplicate stories collapsed. Feeds that fail are skipped with a
+    warning.
+
+    Each article gets a "key", its normalized link, used for de-duplication
+    and the --save store. "link" stays as published and is what gets fetched
+    and shown, since not every site accepts the normalized form.
+    """
+    def load(feed_url: str) -> List[Dict[str, str | None]]:
+        try:
+            items = parse_cbs_rss(fetch_cbs_rss(feed_url))
+        except Exception as exc:
+            logger.warning(f"Error fetching RSS feed {feed_url}: {exc}")
+            return []
+        for item in items:
+            item["key"] = normalize_url(item["link"])
+        return items
+
+    # Feeds are loaded concurrently; keep the --feed order for de-duplication.
+    results = dict(scheduler.map(load, feed_urls))
+    articles = [item for feed_url in feed_urls for item in results[feed_url]]
+    unique = collapse_near_duplicates(articles)
+    if len(unique) < len(articles):
+        logger.info(f"Collapsed {len(articles) - len(unique)} duplicate stories across {len(feed_urls)} feeds")
+    return unique
+
+
 def format_cbs_articles_for_llm(articles: List[Dict[str, str | None]]) -> str:
     """Return a JSON string of articles suitable for LLM consumption."""
-    # Filter out image_url from each article
+    # Filter out image_url and the de-duplication key from each article
     articles_filtered = [
-        {k: v for k, v in article.items() if k != "image_url"}
+        {k: v for k, v in article.items() if k not in ("image_url", "key")}
         for article in articles
     ]
-    return json.dumps(articles_filtered, ensure_ascii=False, indent=2)
+    return json.dumps(articles_filtered, ensure_ascii=False)
 
 
 def send_to_llm(
@@ -157,7 +329,7 @@ def send_to_llm(
 
 def fetch_article_content(url: str) -> Dict[str, str]:
     """
-    Fetch and clean the content of an article using BeautifulSoup.
+    Fetch an article and extract its main content with llm_html_extract.
 
     Args:
         url: The URL of the article to fetch.
@@ -166,37 +338,9 @@ def fetch_article_content(url: str) -> Dict[str, str]:
         A dictionary containing title, body, and other relevant information.
     """
     try:
-        response = httpx.get(url, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = scheduler.fetch(url, timeout=30)
         
-        # Extract title
-        title = ""
-        title_tag = soup.find('title')
-        if title_tag:
-            title = title_tag.get_text().strip()
-        
-        # Extract main content - try common selectors
-        content = ""
-        # Try to find article content
-        article = soup.find('article')
-        if article:
-            content = article.get_text(strip=True)
-        else:
-            # Try common content containers
-            content_selectors = ['div.article-body', 'div.story-content', 'div.post-content', 'div.entry-content']
-            for selector in content_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    content = element.get_text(strip=True)
-                    break
-            
-            # If no specific content found, get all text from body
-            if not content:
-                body = soup.find('body')
-                if body:
-                    content = body.get_text(strip=True)
+        title, content = extract(response.content)
         
         # Clean up the content
         content = re.sub(r'\s+', ' ', content).strip()
@@ -215,6 +359,194 @@ def fetch_article_content(url: str) -> Dict[str, str]:
         }
 
 
+def rank_articles(articles: List[Dict[str, str | None]]) -> List[str]:
+    """
+    Ask the LLM once to order *articles* from most to least important.
+
+    Returns the article links in ranked order. Links not present in
+    *articles* are dropped, and articles the LLM left out are appended in
+    feed order, so the result is always a permutation of the feed.
+    """
+    links = [a.get("link") for a in articles]
+    if len(articles) < 2:
+        return links
+
+    formatted = format_cbs_articles_for_llm(articles)
+    logger.debug(f"Formatted articles: {formatted}")
+    system = "You're an expert news analyst."
+    preprompt = "You are given a list of recent articles in JSON format. Rank them from most to least important. Do not construct URLs from titles; use the 'link' field exactly as provided."
+    prompt = formatted
+    postprompt = "Return only a JSON array of the 'link' values of all articles, ordered from most to least important, exactly as they appear, with no additional text, no explanations, no formatting."
+    result = send_to_llm(system, preprompt, prompt, postprompt)
+    result = re.sub(r'<think>.*?</think>', '', result, flags=re.DOTALL)
+    try:
+        candidates = json.loads(result[result.index("["):result.rindex("]") + 1])
+    except ValueError:
+        candidates = re.findall(r'https?://[^\s"\',\]]+', result)
+
+    known = set(links)
+    ranked: List[str] = []
+    for url in candidates:
+        # Models sometimes answer with objects such as {"link": ...} instead of bare links.
+        if isinstance(url, dict):
+            url = url.get("link")
+        if not isinstance(url, str):
+            continue
+        if url in known and url not in ranked:
+            ranked.append(url)
+        elif url not in known:
+            logger.warning(f"URL {url} not found in article list; skipping.")
+    missing = [url for url in links if url not in ranked]
+    if missing:
+        logger.debug(f"Appending {len(missing)} unranked articles in feed order")
+    return ranked + missing
+
+
+def merge_new_articles(
+    ranked: List[str],
+    by_link: Dict[str, Dict[str, str | None]],
+    new_articles: List[Dict[str, str | None]],
+) -> List[str]:
+    """
+    Insert *new_articles* into the remaining *ranked* links.
+
+    Only the new articles and the RERANK_CONTEXT best remaining ones are sent
+    to the LLM, so a refresh costs a call proportional to the number of new
+    items rather than re-ranking the whole feed.
+    """
+    head = [by_link[url] for url in ranked[:RERANK_CONTEXT]]
+    return rank_articles(head + new_articles) + ranked[RERANK_CONTEXT:]
+
+
+class ArticleStore:
+    """
+    SQLite record of summarized and processed articles for --save.
+
+    Rows are keyed by the SHA-256 of the normalized URL (the primary key is
+    the index), so checking a feed costs one indexed lookup per article no
+    matter how many runs came before. Summaries are kept so an article that
+    reappears, or was summarized ahead but never read, is not sent to the
+    LLM again.
+    """
+
+    def __init__(self, path: str = SAVE_DB) -> None:
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT,
+                summary TEXT,
+                summarized_at REAL,
+                processed_at REAL
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS articles_processed_at ON articles (processed_at)")
+        self.db.commit()
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def import_legacy(self, path: str = LEGACY_SAVE_FILE) -> None:
+        """Import URLs from the old llm-rss-output.txt once, then rename it."""
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            urls = {normalize_url(line.strip()) for line in f if line.strip()}
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO articles (url_hash, url, processed_at) VALUES (?, ?, ?)",
+                [(self.url_hash(url), url, now) for url in urls],
+            )
+            self.db.commit()
+        os.replace(path, path + ".imported")
+        logger.info(f"Imported {len(urls)} URLs from {path} into {SAVE_DB}")
+
+    def processed(self, urls: List[str]) -> set:
+        """Return the subset of *urls* that were already processed."""
+        by_hash = {self.url_hash(url): url for url in urls}
+        hashes = list(by_hash)
+        done = set()
+        with self.lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT url_hash FROM articles WHERE processed_at IS NOT NULL AND url_hash IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                done.update(by_hash[row[0]] for row in rows)
+        return done
+
+    def get_summary(self, url: str) -> str | None:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT summary FROM articles WHERE url_hash = ?", (self.url_hash(url),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_summary(self, url: str, title: str, summary: str) -> None:
+        with self.lock:
+            self.db.execute(
+                """INSERT INTO articles (url_hash, url, title, summary, summarized_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (url_hash) DO UPDATE SET
+                   title = excluded.title, summary = excluded.summary, summarized_at = excluded.summarized_at""",
+                (self.url_hash(url), url, title, summary, time.time()),
+            )
+            self.db.commit()
+
+    def mark_processed(self, url: str) -> None:
+        with self.lock:
+            self.db.execute(
+                """INSERT INTO articles (url_hash, url, processed_at) VALUES (?, ?, ?)
+                   ON CONFLICT (url_hash) DO UPDATE SET processed_at = excluded.processed_at""",
+                (self.url_hash(url), url, time.time()),
+            )
+            self.db.commit()
+
+    def prune(self, max_age_days: float) -> int:
+        """Delete records not processed or summarized in the last *max_age_days*."""
+        cutoff = time.time() - max_age_days * 86400
+        with self.lock:
+            deleted = self.db.execute(
+                "DELETE FROM articles WHERE COALESCE(processed_at, summarized_at, 0) < ?", (cutoff,)
+            ).rowcount
+            self.db.commit()
+        return deleted
+
+
+def summarize_article(url: str, store: ArticleStore | None = None, key: str | None = None) -> str:
+    """
+    Fetch the article at *url* and return the LLM summary without blank lines.
+
+    With a *store*, a previously stored summary is reused and new summaries
+    are recorded under *key*, the normalized URL (default: *url*).
+    """
+    key = key or url
+    if store is not None:
+        cached = store.get_summary(key)
+        if cached:
+            logger.debug(f"Using stored summary for {url}")
+            return cached
+
+    article_data = fetch_article_content(url)
+
+    # Send article information to LLM for summarization
+    system = "You're an expert news analyst."
+    preprompt = "Analyze the following article and provide a summary."
+    prompt = f"Title: {article_data['title']}\nURL: {article_data['url']}\nContent: {article_data['content']}"
+    postprompt = "Provide a concise summary of the article's main points. Do not include any preamble or further explanation - just the summary."
+    result = send_to_llm(system, preprompt, prompt, postprompt)
+    result = re.sub(r'<think>.*?</think>', '', result, flags=re.DOTALL)
+    # Filter out blank lines and ensure one blank line between stories
+    summary = "\n".join(line for line in result.splitlines() if line.strip())
+    if store is not None and summary:
+        store.save_summary(key, article_data["title"], summary)
+    return summary
+
+
 def signal_handler(sig, frame):
     global shutdown_requested
     if shutdown_requested:
@@ -236,106 +568,133 @@ def main() -> None:
     # Set up signal handler for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
 
-    parser = argparse.ArgumentParser(description="Fetch and process CBS News RSS feed.")
+    parser = argparse.ArgumentParser(description="Fetch and process one or more RSS/Atom feeds (default: CBS News Technology).")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     parser.add_argument("--speak", action="store_true", help="Speak the summary using pyttsx3")
-    parser.add_argument("--save", action="store_true", help="Save processed URLs to llm-rss-output.txt and skip them next run")
+    parser.add_argument("--save", action="store_true", help=f"Record processed articles and their summaries in {SAVE_DB} and skip them next run")
+    parser.add_argument("--prune-days", type=float, metavar="DAYS", help=f"With --save, forget articles older than DAYS in {SAVE_DB}")
     parser.add_argument("--random", action="store_true", help="Select a random article instead of using the LLM")
+    parser.add_argument("--feed", action="append", metavar="URL", help="RSS/Atom feed to read; repeat for several feeds (default: the CBS News Technology feed)")
+    parser.add_argument("--feeds", metavar="FILE", help="File with one feed URL per line, polled together with any --feed URLs")
+    parser.add_argument("--refresh", type=int, default=0, metavar="SECONDS", help="Re-poll the feed every SECONDS and rank new articles into the queue; keeps running when the queue is empty (default: off)")
+    parser.add_argument("--prefetch", type=int, default=2, help="Number of articles to select, fetch and summarize ahead while the current one is printed/spoken (default: 2)")
     args = parser.parse_args()
 
     if args.debug:
         logger.setLevel(logging.DEBUG)
+    if args.prefetch < 1:
+        parser.error("--prefetch must be at least 1")
 
-    feed_url = "https://www.cbsnews.com/latest/rss/technology"
-    try:
-        raw_xml = fetch_cbs_rss(feed_url)
-    except Exception as exc:
-        print(f"Error fetching RSS feed: {exc}")
-        return
-
-    try:
-        articles: List[Dict[str, str | None]] = parse_cbs_rss(raw_xml)
-    except Exception as exc:
-        print(f"Error parsing RSS feed: {exc}")
-        return
+    feed_urls = list(args.feed or [])
+    if args.feeds:
+        with open(args.feeds, "r", encoding="utf-8") as f:
+            feed_urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    feed_urls = feed_urls or [DEFAULT_FEED]
 
+    articles: List[Dict[str, str | None]] = fetch_feeds(feed_urls)
     if not articles:
         print("No articles found in the feed.")
         return
 
-    # Load previously processed URLs if --save flag is used
-    saved_urls = set()
-    if args.save and os.path.exists("llm-rss-output.txt"):
-        with open("llm-rss-output.txt", "r", encoding="utf-8") as f:
-            for line in f:
-                saved_urls.add(line.strip())
     # Exclude already processed URLs when --save is used
-    if args.save:
-        articles = [a for a in articles if a.get("link") not in saved_urls]
-
-    # Process articles in a loop, letting the LLM pick one each time
-    while articles and not shutdown_requested:
-        if args.random:
-            article = random.choice(articles)
-            url = article.get("link")
-            print(f"Randomly selected URL: {url}")
-            logger.debug(f"Randomly selected URL: {url}")
-        else:
-            formatted = format_cbs_articles_for_llm(articles)
-            logger.debug(f"Formatted articles: {formatted}")
-            system = "You're an expert news analyst."
-            preprompt = "You are given a list of recent articles in JSON format. Examine them and select the most important one. Do not construct the URL from the title; use the 'link' field exactly as provided. Respond with the exact URL from that field, and nothing else."
-            prompt = formatted
-            postprompt = "Select the article you think is most important. Return only the URL from the 'link' field of that article, exactly as it appears, with no additional text, no explanations, no formatting."
-            result = send_to_llm(system, preprompt, prompt, postprompt)
-            result = re.sub(r'<think>.*?</think>', '', result, flags=re.DOTALL)
-            url_match = re.search(r'https?://[^\s"\']+', result)
-            if not url_match:
-                logger.warning("No URL found in LLM response.")
-                break
-            url = url_match.group(0)
-            # Ensure the URL is one of the article links
-            if url not in [a.get("link") for a in articles]:
-                logger.warning(f"URL {url} not found in article list; skipping.")
-                continue
-            if args.save and url in saved_urls:
-                logger.info(f"Skipping already processed URL: {url}")
-                # Remove from list to avoid re‑processing
-                articles = [a for a in articles if a.get("link") != url]
-                continue
-            print(f"Selected URL: {url}")
-            logger.debug(f"Selected URL: {url}")
-
-        # Fetch the article content
-        article_data = fetch_article_content(url)
-
-        # Send article information to LLM for summarization
-        system = "You're an expert news analyst."
-        preprompt = "Analyze the following article and provide a summary."
-        prompt = f"Title: {article_data['title']}\nURL: {article_data['url']}\nContent: {article_data['content']}"
-        postprompt = "Provide a concise summary of the article's main points. Do not include any preamble or further explanation - just the summary."
-        result = send_to_llm(system, preprompt, prompt, postprompt)
-        result = re.sub(r'<think>.*?</think>', '', result, flags=re.DOTALL)
-        # Filter out blank lines and ensure one blank line between stories
-        lines = [line for line in result.splitlines() if line.strip()]
-        if lines:
-            summary_text = "\n".join(lines)
+    store = ArticleStore() if args.save else None
+    if store is not None:
+        store.import_legacy()
+        if args.prune_days:
+            logger.info(f"Pruned {store.prune(args.prune_days)} old articles from {SAVE_DB}")
+        done = store.processed([a.get("key") for a in articles])
+        articles = [a for a in articles if a.get("key") not in done]
+
+    # Select, fetch and summarize up to --prefetch articles ahead in the
+    # background so printing and speaking never wait on the network or the LLM.
+    ready: "queue.Queue" = queue.Queue(maxsize=args.prefetch)
+    pool = ThreadPoolExecutor(max_workers=args.prefetch)
+    # Set by the consumer when it stops reading; the producer must not submit after that.
+    stop = threading.Event()
+
+    def offer(item) -> bool:
+        """Put *item* on the ready queue; returns False instead of blocking once stopped."""
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        by_link = {a.get("link"): a for a in articles}
+        try:
+            if args.random:
+                order = list(by_link)
+                random.shuffle(order)
+            else:
+                # Rank the whole feed once and walk the ranking.
+                order = rank_articles(articles)
+            last_poll = time.time()
+            while not shutdown_requested and not stop.is_set():
+                if args.refresh and time.time() - last_poll >= args.refresh:
+                    last_poll = time.time()
+                    new_articles = collapse_near_duplicates(fetch_feeds(feed_urls), known=list(by_link.values()))
+                    if store is not None and new_articles:
+                        done = store.processed([a.get("key") for a in new_articles])
+                        new_articles = [a for a in new_articles if a.get("key") not in done]
+                    if new_articles:
+                        logger.info(f"{len(new_articles)} new articles in feed")
+                        by_link.update((a.get("link"), a) for a in new_articles)
+                        if args.random:
+                            order += [a.get("link") for a in new_articles]
+                            random.shuffle(order)
+                        else:
+                            order = merge_new_articles(order, by_link, new_articles)
+                if not order:
+                    if not args.refresh:
+                        break
+                    stop.wait(1)
+                    continue
+                if stop.is_set():
+                    break
+                url = order.pop(0)
+                key = by_link[url].get("key")
+                if not offer((url, key, pool.submit(summarize_article, url, store, key))):
+                    break
+        except Exception as exc:
+            logger.error(f"Article selection failed: {exc}")
+        finally:
+            offer(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    while not shutdown_requested:
+        item = ready.get()
+        if item is None:
+            break
+        url, key, future = item
+        print(f"Selected URL: {url}")
+        try:
+            summary_text = future.result()
+        except Exception as exc:
+            logger.error(f"Error summarizing {url}: {exc}")
+            continue
+        if summary_text:
             print(summary_text)
             if args.speak:
                 speak(summary_text)
         print()
 
         # Save the URL if requested
-        if args.save:
-            with open("llm-rss-output.txt", "a", encoding="utf-8") as f:
-                f.write(url + "\n")
-        # Remove the processed article from the list
-        articles = [a for a in articles if a.get("link") != url]
+        if store is not None:
+            store.mark_processed(key)
 
         if shutdown_requested:
             print("Shutting down after current article...")
             break
 
+    # Stop the producer before shutting the pool down so it never submits to a closed pool.
+    stop.set()
+    producer.join()
+    pool.shutdown(wait=False, cancel_futures=True)
     print("Done.")
 
 
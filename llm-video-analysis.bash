@@ -32,6 +32,12 @@ interactive_prompt=false
 # Option to generate subtitles via transcription
 transcribe=false
 
+# Option to drop near-identical consecutive frames
+dedup_frames=false
+
+# Option to tell the model which frames stand for skipped near-duplicates
+annotate_skips=false
+
 # Fixed frame rate
 frame_rate=2
 bc_scale=2
@@ -58,6 +64,41 @@ prepare_subtitles() {
     fi
 }
 
+# Helper: frame number N of a frame_N.jpg path. Frames dropped by --dedup
+# leave gaps in the numbering, so times are computed from this number rather
+# than from the position in the list.
+frame_index() {
+    local number=${1##*/frame_}
+    echo $((10#${number%.jpg}))
+}
+
+# Helper: rename the scene_<pts>.jpg files written with -frame_pts to
+# frame_<pts + 1>.jpg, so N is the same 1-based fixed-rate frame number as
+# without --scene-change and (N - 1) / frame_rate is the frame's time.
+renumber_scene_frames() {
+    local path number
+    for path in "${temp_dir}"/scene_*.jpg; do
+        [ -e "$path" ] || continue
+        number=${path##*/scene_}
+        mv "$path" "$(printf '%s/frame_%08d.jpg' "${temp_dir%/}" $((10#${number%.jpg} + 1)))"
+    done
+}
+
+# Helper: prompt for a set of frames, with the skipped-range note when --annotate-skips is on
+frames_prompt() {
+    local base_prompt=$1
+    shift
+    if $annotate_skips; then
+        local note
+        note=$(llm_frame_dedup.py --annotate "$temp_dir" "$@")
+        if [ -n "$note" ]; then
+            echo "${base_prompt} ${note}"
+            return
+        fi
+    fi
+    echo "$base_prompt"
+}
+
 # Frames per batch
 frames_per_batch=20
 
@@ -92,6 +133,15 @@ while [[ $# -gt 0 ]]; do
       interactive_prompt=true
       shift
       ;;
+    -d|--dedup)
+      dedup_frames=true
+      shift
+      ;;
+    --annotate-skips)
+      dedup_frames=true
+      annotate_skips=true
+      shift
+      ;;
     -f|--fps) # New flag to set frames per second
       frame_rate=$2
       shift
@@ -109,6 +159,8 @@ Options:
   -nt, --no-title         Skip extracting the video title.
   -p, --prompt            Enable interactive prompting mode.
   -f, --fps <fps>         Set the frame extraction rate (default: 2 fps).
+  -d, --dedup             Drop near-identical consecutive frames before the vision calls.
+  --annotate-skips        With --dedup, tell the model which frames stand for skipped ones.
   -h, --help              Show this help message and exit.
 
 Provide the video URL as the final argument.
@@ -125,7 +177,7 @@ done
 
 # Check if video_url is empty
 if [ -z "$video_url" ]; then
-  echo "Usage: $0 [-a|--all-frames] [-s|--scene-change] [-ss|--subtitles] [-c|--cookies] [-nt|--no-title] [-p|--prompt] [-f|--fps <fps>] [-h|--help] <video_url>"
+  echo "Usage: $0 [-a|--all-frames] [-s|--scene-change] [-ss|--subtitles] [-c|--cookies] [-nt|--no-title] [-p|--prompt] [-f|--fps <fps>] [-d|--dedup] [--annotate-skips] [-h|--help] <video_url>"
   exit 1
 fi
 
@@ -251,37 +303,31 @@ fi
 
 # Extract frames from the video
 if $scene_change; then
-  # Extract scene frames with fixed frame rate
-  ffmpeg -i "${video}" -vf "fps=${frame_rate},select='gt(scene,${scene_threshold})'" -vsync vfr -q:v 0 "${temp_dir}/frame_%08d.jpg"
-
-  # Rename extracted frames with their presentation timestamp (pts_time)
-  for frame_path in "${temp_dir}"/frame_*.jpg; do
-    pts=${frame_path##*/frame_}
-    pts=${pts%.jpg}
-    pts_time=$(printf "%.3f" "$(bc -l <<< "$pts/16000")")
-    if [[ -n "$pts_time" ]]; then
-      new_name=$(printf "frame_%.3f.jpg" "$pts_time")
-      mv "$frame_path" "$temp_dir/$new_name"
-    else
-      echo "Warning: Could not determine pts_time for $frame_path"
-    fi
-  done
+  # Extract scene frames with fixed frame rate, named by pts (the 0-based fixed-rate frame index)
+  ffmpeg -i "${video}" -vf "fps=${frame_rate},select='gt(scene,${scene_threshold})'" -vsync vfr -frame_pts 1 -q:v 0 "${temp_dir}/scene_%08d.jpg"
+  renumber_scene_frames
 else
   # Extract frames at a fixed rate
   ffmpeg -i "${video}" -vf "fps=${frame_rate}" -q:v 0 "${temp_dir}/frame_%08d.jpg"
+fi
 
-  # Rename extracted frames with their presentation timestamp (pts_time)
-  for frame_path in "${temp_dir}"/frame_*.jpg; do
-    pts=${frame_path##*/frame_}
-    pts=${pts%.jpg}
-    pts_time=$(printf "%.3f" "$(bc -l <<< "$pts/16000")")
-    if [[ -n "$pts_time" ]]; then
-      new_name=$(printf "frame_%.3f.jpg" "$pts_time")
-      mv "$frame_path" "$temp_dir/$new_name"
-    else
-      echo "Warning: Could not determine pts_time for $frame_path"
-    fi
-  done
+# Frames keep their frame_N.jpg names: the vision scripts read the frame
+# numbers from them, and a frame's time is (N - 1) / frame_rate.
+if $scene_change; then
+  # Scene frames are sparse, so count the fixed-rate frames from the duration
+  duration=$(ffprobe -v error -show_entries format=duration -of csv=p=0 "${video}")
+  total_frames=$(awk -v d="$duration" -v r="$frame_rate" 'BEGIN { n = d * r; printf "%d", (n > int(n)) ? int(n) + 1 : n }')
+  last_frame=$(ls "${temp_dir}"/frame_*.jpg 2>/dev/null | tail -n 1)
+  if [ -n "$last_frame" ] && (( total_frames < $(frame_index "$last_frame") )); then
+    total_frames=$(frame_index "$last_frame")
+  fi
+else
+  total_frames=$(ls "${temp_dir}"/frame_*.jpg 2>/dev/null | wc -l)
+fi
+
+# Drop near-identical frames; the kept frames keep their numbers, so timestamps are unchanged
+if $dedup_frames; then
+  llm_frame_dedup.py --frame-rate "$frame_rate" "$temp_dir" || echo "Warning: Frame deduplication failed; using all frames." >&2
 fi
 
 # Define summarization prompts and temperature
@@ -328,7 +374,7 @@ if $interactive_prompt; then
 
       # Calculate start and end times for the entire video
       start_time=0
-      end_time=$(echo "scale=$bc_scale; ($num_images / $frame_rate)" | bc)
+      end_time=$(echo "scale=$bc_scale; ($total_frames / $frame_rate)" | bc)
 
       current_python_script="llm-python-vision-multi-images.py" # Default script
       current_subtitle_arg=""
@@ -350,7 +396,7 @@ if $interactive_prompt; then
       fi
 
       # Construct the command arguments
-      cmd_args=("$prompt" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
+      cmd_args=("$(frames_prompt "$prompt" "${images[@]}")" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
       if [ -n "$current_subtitle_arg" ]; then
         cmd_args+=("$current_subtitle_arg") # Subtitle is sys.argv[3] for file script
       fi
@@ -380,9 +426,13 @@ if $interactive_prompt; then
         subset=("${images[@]:i:$frames_per_batch}")
         num_subset=${#subset[@]}
 
-        # Get the starting and ending frame numbers
-        start_frame=$((i + 1))
-        end_frame=$((i + $num_subset))
+        # Get the starting and ending frame numbers (a frame stands for any dropped ones after it)
+        start_frame=$(frame_index "${subset[0]}")
+        if (( i + num_subset < num_images )); then
+          end_frame=$(( $(frame_index "${images[i + num_subset]}") - 1 ))
+        else
+          end_frame=$total_frames
+        fi
 
         # Calculate the start and end times in seconds
         start_time=$(echo "scale=$bc_scale; ($start_frame - 1) / $frame_rate" | bc)
@@ -404,7 +454,7 @@ if $interactive_prompt; then
         fi
 
         # Construct the command arguments
-        cmd_args=("$prompt" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
+        cmd_args=("$(frames_prompt "$prompt" "${subset[@]}")" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
         if [ -n "$current_subtitle_arg" ]; then
           cmd_args+=("$current_subtitle_arg") # Subtitle is sys.argv[3] for file script
         fi
@@ -461,7 +511,7 @@ else # Original non-interactive processing
 
     # Calculate start and end times for the entire video
     start_time=0
-    end_time=$(echo "($num_images / $frame_rate)" | bc)
+    end_time=$(echo "($total_frames / $frame_rate)" | bc)
 
     current_python_script="llm-python-vision-multi-images.py" # Default script
     current_subtitle_arg=""
@@ -483,7 +533,7 @@ else # Original non-interactive processing
     fi
 
     # Construct the command arguments
-    cmd_args=("$prompt" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
+    cmd_args=("$(frames_prompt "$prompt" "${images[@]}")" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
     if [ -n "$current_subtitle_arg" ]; then
       cmd_args+=("$current_subtitle_arg") # Subtitle is sys.argv[3] for file script
     fi
@@ -513,9 +563,13 @@ else # Original non-interactive processing
       subset=("${images[@]:i:$frames_per_batch}")
       num_subset=${#subset[@]}
 
-      # Get the starting and ending frame numbers
-      start_frame=$((i + 1))
-      end_frame=$((i + $num_subset))
+      # Get the starting and ending frame numbers (a frame stands for any dropped ones after it)
+      start_frame=$(frame_index "${subset[0]}")
+      if (( i + num_subset < num_images )); then
+        end_frame=$(( $(frame_index "${images[i + num_subset]}") - 1 ))
+      else
+        end_frame=$total_frames
+      fi
 
       # Calculate the start and end times in seconds
       start_time=$(echo "($start_frame - 1) / $frame_rate" | bc)
@@ -537,7 +591,7 @@ else # Original non-interactive processing
       fi
 
       # Construct the command arguments
-      cmd_args=("$prompt" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
+      cmd_args=("$(frames_prompt "$prompt" "${subset[@]}")" "$temperature") # Prompt is sys.argv[1], Temperature is sys.argv[2]
       if [ -n "$current_subtitle_arg" ]; then
         cmd_args+=("$current_subtitle_arg") # Subtitle is sys.argv[3] for file script
       fi
@@ -2,11 +2,19 @@
 """
 llm-web-bullets.py
 
-Fetch one or more webpages, extract the visible text from the <body> using BeautifulSoup,
+Fetch one or more webpages, extract the main content text (see llm_html_extract.py),
 and send each to a local LLM backend (compatible with OpenAI's client API) for summarization.
 The script accepts multiple URLs as positional arguments and an optional ``--debug`` flag.
 Prompts, model, and temperature are hard‑coded within the script.
 
+Pages are fetched concurrently over a pooled HTTP client, and each page is summarized
+as soon as it arrives, with at most as many summaries in flight as the backend has
+slots. The reconcile step starts once every summary has landed; when the summaries
+exceed the reconcile token budget they are reconciled in concurrent groups and
+the group results reconciled again (a tree reduce).
+
+Requires: requests, openai, httpx, beautifulsoup4 and lxml (pip install requests openai httpx beautifulsoup4 lxml).
+
 Usage:
     python llm-web-bullets.py <url1> [<url2> ...] [--debug]
 
@@ -15,12 +23,19 @@ Example:
 """
 
 import argparse
+import asyncio
+import json
+import math
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from bs4 import BeautifulSoup
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import httpx
 from typing import Dict, List, Optional
+from llm_host_scheduler import AsyncHostScheduler
+from llm_html_extract import extract_text
 import datetime
 
 CURRENT_DATE = datetime.date.today().isoformat()
@@ -35,47 +50,102 @@ USER_AGENT = "llm-web-bullets/1.0"
 MODEL = "Qwen3-30B-A3B-Instruct-2507-Q8_0"
 TEMPERATURE = 0.0  # default temperature, adjust as needed
 SEARX_BASE_URL = "http://searx.lan"
-
-def fetch_body_text(url: str) -> str:
-    """Download the page at *url* and return the cleaned body text."""
+# Concurrent summaries when the backend does not report its slot count.
+DEFAULT_LLM_SLOTS = 4
+# Token budget for the summaries in one reconcile request; more are tree-reduced.
+RECONCILE_TOKEN_BUDGET = 6000
+CHARS_PER_TOKEN = 4
+# Number of query variants requested from the planner and searched concurrently.
+SEARCH_VARIANTS = 4
+# Results kept per search and after merging the variants.
+MAX_SEARCH_RESULTS = 30
+# Connection pool limits for page fetches.
+MAX_CONNECTIONS = 20
+# Embedding model used by the optional relevance pre-filter.
+EMBEDDING_MODEL = "nomic-embed-text-v1.5.q8_0"
+# Results below this cosine similarity to the question are dropped by the pre-filter...
+MIN_SIMILARITY = 0.3
+# ...but at least this many of the best-matching results are always kept.
+PREFILTER_MIN_KEEP = 5
+
+
+def extract_body_text(html: str) -> str:
+    """Return the main content text of an HTML document, without navigation and footers."""
+    return extract_text(html)
+
+
+async def fetch_body_text(http: httpx.AsyncClient, scheduler: AsyncHostScheduler, url: str) -> str:
+    """
+    Download the page at *url* (through the shared HTTP cache, within the
+    scheduler's per-host limits) and return the cleaned body text.
+    """
     try:
-        response = requests.get(url, timeout=30, headers={"User-Agent": USER_AGENT})
-        response.raise_for_status()
-    except requests.RequestException as e:
+        response = await scheduler.fetch(http, url)
+    except httpx.HTTPError as e:
         print(f"[ERROR] Failed to fetch {url}: {e}", file=sys.stderr)
         return ""
-    soup = BeautifulSoup(response.text, "html.parser")
-    # Prefer the <body> tag; fall back to the whole document if missing.
-    if soup.body:
-        return soup.body.get_text(separator="\n", strip=True)
-    return soup.get_text(separator="\n", strip=True)
+    # Parsing is CPU-bound; keep it off the event loop so other fetches proceed.
+    return await asyncio.to_thread(extract_body_text, response.text)
 
 
-def generate_search_terms(question: str) -> str:
+def get_llm_slots() -> int:
     """
-    Ask the LLM to produce a concise search query for SearxNG based on the user's question.
+    Return the number of parallel slots the backend serves, as reported by
+    llama-server's /props endpoint, or DEFAULT_LLM_SLOTS if unavailable.
     """
-    system_prompt = f"You are an assistant that converts user questions into short search queries. Today is {CURRENT_DATE}."
-    user_prompt = f"Question: {question}\nGenerate a short search query suitable for a news search."
+    props_url = BASE_URL.rstrip("/").removesuffix("/v1") + "/props"
+    try:
+        response = requests.get(props_url, timeout=5)
+        response.raise_for_status()
+        slots = int(response.json().get("total_slots", 0))
+        return slots if slots > 0 else DEFAULT_LLM_SLOTS
+    except (requests.RequestException, ValueError, AttributeError):
+        return DEFAULT_LLM_SLOTS
+
+
+def plan_search(question: str) -> Dict[str, object]:
+    """
+    Ask the LLM, in one request, for several search query variants and a
+    time range for the news search.
+
+    Returns {"queries": [...], "time_range": "day" | "week" | "month" | "year" | None}.
+    Falls back to the question itself and no time range if the answer cannot be parsed.
+    """
+    system_prompt = f"You are an assistant that plans news searches. Today is {CURRENT_DATE}."
     client = OpenAI(
         base_url=BASE_URL,
         api_key=API_KEY,
         timeout=TIMEOUT,
     )
+    plan: Dict[str, object] = {"queries": [question], "time_range": None}
     try:
         completion = client.chat.completions.create(
             model=MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
+                {"role": "user", "content": f"Question: {question}"},
+                {"role": "user", "content": (
+                    f"Write {SEARCH_VARIANTS} different short search queries suitable for a news search "
+                    "(rephrasings, synonyms, key entities), and choose a time range for the search from: day, week, month, year. "
+                    'Respond with ONLY a JSON object like {"queries": ["...", "..."], "time_range": "week"}.'
+                )},
             ],
             temperature=0.0,
             stream=False,
         )
-        return completion.choices[0].message.content.strip()
+        answer = completion.choices[0].message.content
+        answer = re.sub(r"<think>.*?</think>", "", answer, flags=re.DOTALL)
+        parsed = json.loads(answer[answer.index("{"):answer.rindex("}") + 1])
+        queries = [q.strip() for q in parsed.get("queries", []) if isinstance(q, str) and q.strip()]
+        if queries:
+            # Drop repeated variants but keep the LLM's order.
+            plan["queries"] = list(dict.fromkeys(queries))[:SEARCH_VARIANTS]
+        time_range = str(parsed.get("time_range", "")).strip().lower()
+        if time_range in {"day", "week", "month", "year"}:
+            plan["time_range"] = time_range
     except Exception as e:
-        print(f"[ERROR] generate_search_terms failed: {e}", file=sys.stderr)
-        return ""
+        print(f"[ERROR] plan_search failed: {e}", file=sys.stderr)
+    return plan
 
 
 def searxng_news_search(query: str, time_range: Optional[str] = None) -> List[Dict[str, str]]:
@@ -88,13 +158,14 @@ def searxng_news_search(query: str, time_range: Optional[str] = None) -> List[Di
         "User-Agent": USER_AGENT,
         "Content-Type": "application/x-www-form-urlencoded",
     }
-    time_range_param = f"&time_range={time_range}" if time_range else ""
-    data = f"q={query}&categories=news&language=auto{time_range_param}&safesearch=0&theme=simple"
+    data = {"q": query, "categories": "news", "language": "auto", "safesearch": "0", "theme": "simple"}
+    if time_range:
+        data["time_range"] = time_range
     response = requests.post(search_url, headers=headers, data=data, verify=False, timeout=30)
     response.raise_for_status()
     soup = BeautifulSoup(response.text, "html.parser")
     results: List[Dict[str, str]] = []
-    for article in soup.find_all("article", class_="result")[:30]:
+    for article in soup.find_all("article", class_="result")[:MAX_SEARCH_RESULTS]:
         url_header = article.find("a", class_="url_header")
         if not url_header:
             continue
@@ -109,12 +180,46 @@ def searxng_news_search(query: str, time_range: Optional[str] = None) -> List[Di
     return results
 
 
-def select_time_range(question: str) -> str:
+def url_key(url: str) -> str:
+    """Return *url* without fragment or trailing slash, for de-duplicating results."""
+    return url.split("#", 1)[0].rstrip("/")
+
+
+def search_variants(queries: List[str], time_range: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Issue every query to SearxNG concurrently and merge the results.
+
+    Results are interleaved by rank across queries, de-duplicated by URL and
+    capped at MAX_SEARCH_RESULTS. A query that fails is reported and skipped.
+    """
+    def search(query: str) -> List[Dict[str, str]]:
+        try:
+            return searxng_news_search(query, time_range)
+        except requests.RequestException as e:
+            print(f"[ERROR] searx search for {query!r} failed: {e}", file=sys.stderr)
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(len(queries), 1)) as pool:
+        result_lists = list(pool.map(search, queries))
+
+    merged: List[Dict[str, str]] = []
+    seen = set()
+    for rank in range(max((len(results) for results in result_lists), default=0)):
+        for results in result_lists:
+            if rank < len(results):
+                key = url_key(results[rank]["url"])
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(results[rank])
+    return merged[:MAX_SEARCH_RESULTS]
+
+
+def is_relevant(question: str, title: str, description: str) -> bool:
     """
-    Ask the LLM to choose a time range (day, week, month, year) for a news search
-    based on the provided question. Returns the chosen time range as a string.
+    Ask the LLM whether a news article (title + description) is relevant to the question.
+    Returns True if the LLM answers affirmatively.
     """
-    system_prompt = f"You are an assistant that selects an appropriate time range for news searches. Today is {CURRENT_DATE}."
+    system_prompt = f"You are a relevance classifier. Today is {CURRENT_DATE}."
     client = OpenAI(
         base_url=BASE_URL,
         api_key=API_KEY,
@@ -126,26 +231,34 @@ def select_time_range(question: str) -> str:
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Question: {question}"},
-                {"role": "user", "content": "Based on the question, choose a time range for searching news. Options are: day, week, month, year. Respond with only the chosen option."},
+                {"role": "user", "content": f"Article Title: {title}"},
+                {"role": "user", "content": f"Article Description: {description}"},
+                {"role": "user", "content": "Answer with ONLY 'YES' if the article is relevant, otherwise answer with ONLY 'NO'."},
             ],
             temperature=0.0,
             stream=False,
         )
-        answer = completion.choices[0].message.content.strip().lower()
-        if answer in {"day", "week", "month", "year"}:
-            return answer
-        return None
+        answer = completion.choices[0].message.content.strip().upper()
+        return answer == "YES"
     except Exception as e:
-        print(f"[ERROR] select_time_range failed: {e}", file=sys.stderr)
-        return None
+        print(f"[ERROR] is_relevant failed: {e}", file=sys.stderr)
+        return False
 
 
-def is_relevant(question: str, title: str, description: str) -> bool:
+def classify_relevance(question: str, results: List[Dict[str, str]]) -> List[bool]:
     """
-    Ask the LLM whether a news article (title + description) is relevant to the question.
-    Returns True if the LLM answers affirmatively.
+    Classify all search *results* against the question in a single LLM request.
+
+    The LLM returns a JSON array with one boolean (or 0–1 score) per result.
+    Falls back to per-result is_relevant() calls if the answer cannot be parsed.
     """
+    if not results:
+        return []
     system_prompt = f"You are a relevance classifier. Today is {CURRENT_DATE}."
+    listing = "\n".join(
+        f"{i + 1}. Title: {result.get('title', '')}\n   Description: {result.get('content', '')}"
+        for i, result in enumerate(results)
+    )
     client = OpenAI(
         base_url=BASE_URL,
         api_key=API_KEY,
@@ -157,34 +270,71 @@ def is_relevant(question: str, title: str, description: str) -> bool:
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Question: {question}"},
-                {"role": "user", "content": f"Article Title: {title}"},
-                {"role": "user", "content": f"Article Description: {description}"},
-                {"role": "user", "content": "Answer with ONLY 'YES' if the article is relevant, otherwise answer with ONLY 'NO'."},
+                {"role": "user", "content": f"Articles:\n{listing}"},
+                {"role": "user", "content": f"For each of the {len(results)} articles, in order, decide whether it is relevant to the question. Answer with ONLY a JSON array of {len(results)} booleans, e.g. [true, false, ...]."},
             ],
             temperature=0.0,
             stream=False,
         )
-        answer = completion.choices[0].message.content.strip().upper()
-        return answer == "YES"
+        answer = completion.choices[0].message.content
+        answer = re.sub(r"<think>.*?</think>", "", answer, flags=re.DOTALL)
+        verdicts = json.loads(answer[answer.index("["):answer.rindex("]") + 1])
+        if len(verdicts) != len(results):
+            raise ValueError(f"expected {len(results)} verdicts, got {len(verdicts)}")
+        return [
+            v >= 0.5 if isinstance(v, (int, float)) and not isinstance(v, bool)
+            else str(v).strip().lower() in {"true", "yes"}
+            for v in verdicts
+        ]
     except Exception as e:
-        print(f"[ERROR] is_relevant failed: {e}", file=sys.stderr)
-        return False
+        print(f"[ERROR] classify_relevance failed ({e}), classifying one by one.", file=sys.stderr)
+        return [is_relevant(question, r.get("title", ""), r.get("content", "")) for r in results]
 
 
-def summarize(document: str, url: str) -> str:
-    """Send *document* to the local LLM backend and return the streamed summary."""
-    system_prompt = f"You are a helpful assistant. Today is {CURRENT_DATE}. If the article contains no text, do not fabricate content; only summarize the provided text."
-    pre_prompt = f"The following is the text from {url}:"
-    post_prompt = "Create a complete but concise multi-tier bullet point summary of this article."
-    temperature = TEMPERATURE  # configurable temperature
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Return the cosine similarity of two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
 
+
+def embedding_prefilter(question: str, results: List[Dict[str, str]], min_similarity: float = MIN_SIMILARITY) -> List[Dict[str, str]]:
+    """
+    Drop results whose title + description embedding is far from the question.
+
+    Results are embedded in one request. At least PREFILTER_MIN_KEEP of the
+    closest results are kept. On any embedding error the results are returned
+    unchanged.
+    """
     client = OpenAI(
         base_url=BASE_URL,
         api_key=API_KEY,
         timeout=TIMEOUT,
     )
+    texts = [question] + [f"{r.get('title', '')}\n{r.get('content', '')}" for r in results]
     try:
-        completion = client.chat.completions.create(
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    except Exception as e:
+        print(f"[ERROR] embedding_prefilter failed: {e}", file=sys.stderr)
+        return results
+    embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    similarities = [cosine_similarity(embeddings[0], emb) for emb in embeddings[1:]]
+
+    keep_ranked = sorted(range(len(results)), key=lambda i: similarities[i], reverse=True)
+    keep = set(keep_ranked[:PREFILTER_MIN_KEEP])
+    keep.update(i for i, sim in enumerate(similarities) if sim >= min_similarity)
+    return [result for i, result in enumerate(results) if i in keep]
+
+
+async def summarize(client: AsyncOpenAI, document: str, url: str) -> str:
+    """Send *document* to the local LLM backend and return the streamed summary."""
+    system_prompt = f"You are a helpful assistant. Today is {CURRENT_DATE}. If the article contains no text, do not fabricate content; only summarize the provided text."
+    pre_prompt = f"The following is the text from {url}:"
+    post_prompt = "Create a complete but concise multi-tier bullet point summary of this article."
+    temperature = TEMPERATURE  # configurable temperature
+
+    try:
+        completion = await client.chat.completions.create(
             model=MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -195,23 +345,77 @@ def summarize(document: str, url: str) -> str:
             temperature=temperature,
             stream=True,
         )
+
+        result = ""
+        async for chunk in completion:
+            if chunk.choices and chunk.choices[0].delta.content:
+                result += chunk.choices[0].delta.content
+        return result
     except Exception as e:
         print(f"[ERROR] summarize failed: {e}", file=sys.stderr)
         return ""
 
-    result = ""
-    for chunk in completion:
-        if chunk.choices and chunk.choices[0].delta.content:
-            result += chunk.choices[0].delta.content
-    return result
 
+async def fetch_and_summarize(
+    http: httpx.AsyncClient,
+    scheduler: AsyncHostScheduler,
+    client: AsyncOpenAI,
+    slots: asyncio.Semaphore,
+    url: str,
+    debug: bool,
+) -> str:
+    """Fetch *url* and summarize it once an LLM slot is free. Returns "" if the page has no text."""
+    document = await fetch_body_text(http, scheduler, url)
+    if debug:
+        print(f"[DEBUG] Cleaned body text for {url}:", file=sys.stderr)
+        print(document, file=sys.stderr)
+        print("-" * 80, file=sys.stderr)
+
+    # Skip LLM inference if the fetched body text is empty.
+    if not document.strip():
+        if debug:
+            print(f"[DEBUG] No body text for {url}, skipping LLM inference.", file=sys.stderr)
+        return ""
 
-def reconcile(summaries: Dict[str, str]) -> str:
+    async with slots:
+        summary = await summarize(client, document, url)
+    if debug:
+        print(f"[DEBUG] Bullet‑point summary for {url}:", file=sys.stderr)
+        print(summary, file=sys.stderr)
+        print("-" * 80, file=sys.stderr)
+    return summary
+
+
+async def summarize_urls(urls: List[str], llm_slots: int, debug: bool = False) -> Dict[str, str]:
     """
-    Send the collected bullet‑point summaries to the LLM backend and ask it to
+    Fetch and summarize all *urls* concurrently.
+
+    Returns a mapping of URL → summary in the original URL order, omitting
+    pages that had no text.
+    """
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    slots = asyncio.Semaphore(llm_slots)
+    # Many hosts are fetched at once, but only a few requests hit any one host.
+    scheduler = AsyncHostScheduler(global_limit=MAX_CONNECTIONS)
+    async with httpx.AsyncClient(
+        timeout=30,
+        headers={"User-Agent": USER_AGENT},
+        follow_redirects=True,
+        limits=limits,
+    ) as http, AsyncOpenAI(base_url=BASE_URL, api_key=API_KEY, timeout=TIMEOUT) as client:
+        results = await asyncio.gather(
+            *(fetch_and_summarize(http, scheduler, client, slots, url, debug) for url in urls)
+        )
+
+    return {url: summary for url, summary in zip(urls, results) if summary}
+
+
+async def reconcile_group(client: AsyncOpenAI, slots: asyncio.Semaphore, summaries: Dict[str, str]) -> str:
+    """
+    Send one group of bullet‑point summaries to the LLM backend and ask it to
     reconcile them into a cohesive summary.
 
-    *summaries* is a mapping of URL → bullet‑point summary.
+    *summaries* is a mapping of source label (URL) → bullet‑point summary.
     """
     system_prompt = f"You are a helpful assistant. Today is {CURRENT_DATE}. If any of the provided summaries lack content, do not fabricate information; only use the given summaries."
     # Build the message list with a separate user entry for each URL and its summary.
@@ -231,27 +435,83 @@ def reconcile(summaries: Dict[str, str]) -> str:
         }
     )
 
-    client = OpenAI(
-        base_url=BASE_URL,
-        api_key=API_KEY,
-        timeout=TIMEOUT,
-    )
-    try:
-        completion = client.chat.completions.create(
-            model=MODEL,
-            messages=messages,
-            temperature=TEMPERATURE,
-            stream=True,
-        )
-    except Exception as e:
-        print(f"[ERROR] reconcile failed: {e}", file=sys.stderr)
+    async with slots:
+        try:
+            completion = await client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                temperature=TEMPERATURE,
+                stream=True,
+            )
+            result = ""
+            async for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    result += chunk.choices[0].delta.content
+            return result
+        except Exception as e:
+            print(f"[ERROR] reconcile failed: {e}", file=sys.stderr)
+            return ""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used to size reconcile groups."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def entry_tokens(label: str, summary: str) -> int:
+    """Tokens one summary adds to a reconcile prompt, including its label line."""
+    return estimate_tokens(f"The following is the bullet point summary of {label}:") + estimate_tokens(summary)
+
+
+async def reconcile(
+    summaries: Dict[str, str],
+    llm_slots: int,
+    token_budget: int = RECONCILE_TOKEN_BUDGET,
+    debug: bool = False,
+) -> str:
+    """
+    Reconcile all *summaries* into one summary with a tree reduce.
+
+    If every summary fits in *token_budget* they are reconciled in a single
+    request. Otherwise they are split into groups of k, where k is as many of
+    the largest summaries as fit in the budget, the groups are reconciled
+    concurrently, and the group results are reconciled the same way until one
+    request suffices. The number of sequential rounds grows with
+    log_k(sources) instead of the final prompt growing with every source.
+    Group results are labelled "group N" so their labels stay short; label
+    lines count towards the budget.
+    """
+    if not summaries:
         return ""
+    slots = asyncio.Semaphore(llm_slots)
+    level = 0
+    async with AsyncOpenAI(base_url=BASE_URL, api_key=API_KEY, timeout=TIMEOUT) as client:
+        while True:
+            if len(summaries) == 1 or sum(entry_tokens(*item) for item in summaries.items()) <= token_budget:
+                return await reconcile_group(client, slots, summaries)
+
+            k = max(2, token_budget // max(entry_tokens(*item) for item in summaries.items()))
+            items = list(summaries.items())
+            groups = [dict(items[i:i + k]) for i in range(0, len(items), k)]
+            level += 1
+            if debug:
+                print(f"[DEBUG] Reconcile level {level}: {len(items)} summaries in {len(groups)} groups of up to {k}", file=sys.stderr)
+
+            results = iter(await asyncio.gather(
+                *(reconcile_group(client, slots, group) for group in groups if len(group) > 1)
+            ))
+            summaries = {}
+            for i, group in enumerate(groups):
+                if len(group) > 1:
+                    label, result = f"group {i + 1}", next(results)
+                else:
+                    # A leftover single summary goes up a level unchanged.
+                    label, result = next(iter(group.items()))
+                if result:
+                    summaries[label] = result
+            if not summaries:
+                return ""
 
-    result = ""
-    for chunk in completion:
-        if chunk.choices and chunk.choices[0].delta.content:
-            result += chunk.choices[0].delta.content
-    return result
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -272,40 +532,63 @@ def main() -> None:
         action="store_true",
         help="Print debug information to stderr.",
     )
+    parser.add_argument(
+        "--slots",
+        type=int,
+        help="Maximum concurrent summaries (default: the backend's slot count from /props).",
+    )
+    parser.add_argument(
+        "--reconcile-budget",
+        type=int,
+        default=RECONCILE_TOKEN_BUDGET,
+        help=f"Approximate token budget for summaries in one reconcile request; larger sets are reconciled in concurrent groups (default: {RECONCILE_TOKEN_BUDGET}).",
+    )
+    parser.add_argument(
+        "--embedding-prefilter",
+        action="store_true",
+        help="Drop search results that are far from the question by embedding similarity before the LLM relevance check.",
+    )
+    parser.add_argument(
+        "--min-similarity",
+        type=float,
+        default=MIN_SIMILARITY,
+        help=f"Cosine similarity threshold for --embedding-prefilter (default: {MIN_SIMILARITY}).",
+    )
     args = parser.parse_args()
 
     debug = args.debug
     if args.websearch:
         question = args.websearch
-        # Generate a search query from the question using the LLM.
-        search_query = generate_search_terms(question)
-        if debug:
-            print(f"[DEBUG] Generated search query: {search_query}", file=sys.stderr)
-
-        # Determine appropriate time range for the news search.
-        time_range = select_time_range(question)
+        # Plan query variants and a time range in a single LLM call.
+        plan = plan_search(question)
         if debug:
-            print(f"[DEBUG] Selected time range: {time_range}", file=sys.stderr)
+            print(f"[DEBUG] Search queries: {plan['queries']}", file=sys.stderr)
+            print(f"[DEBUG] Selected time range: {plan['time_range']}", file=sys.stderr)
 
-        # Retrieve news results from the SearxNG instance.
-        news_results = searxng_news_search(search_query, time_range)
-        if not news_results:
+        # Retrieve news results for all variants concurrently from the SearxNG instance.
+        news_results = search_variants(plan["queries"], plan["time_range"])
+        if not news_results and question not in plan["queries"]:
             if debug:
-                print("[DEBUG] No results, retrying searx search...", file=sys.stderr)
-            news_results = searxng_news_search(search_query, time_range)
-            if not news_results:
-                print("[ERROR] No results after retry, exiting.", file=sys.stderr)
-                sys.exit(1)
+                print("[DEBUG] No results, searching for the question itself...", file=sys.stderr)
+            news_results = search_variants([question], plan["time_range"])
+        if not news_results:
+            print("[ERROR] No search results, exiting.", file=sys.stderr)
+            sys.exit(1)
         if debug:
             print(f"[DEBUG] Retrieved {len(news_results)} news results", file=sys.stderr)
 
+        if args.embedding_prefilter:
+            news_results = embedding_prefilter(question, news_results, args.min_similarity)
+            if debug:
+                print(f"[DEBUG] {len(news_results)} results left after embedding pre-filter", file=sys.stderr)
+
         # Filter results based on relevance to the original question.
         urls = []
-        for result in news_results:
+        verdicts = classify_relevance(question, news_results)
+        for result, relevance in zip(news_results, verdicts):
             title = result.get("title", "")
             description = result.get("content", "")
             url = result.get("url", "")
-            relevance = is_relevant(question, title, description)
             if debug:
                 print("[DEBUG] Evaluating article:", file=sys.stderr)
                 print(f"  URL: {url}", file=sys.stderr)
@@ -317,31 +600,14 @@ def main() -> None:
     else:
         urls = args.urls
 
-    # Collect summaries for each URL.
-    summaries: Dict[str, str] = {}
-    for url in urls:
-        document = fetch_body_text(url)
-        if debug:
-            print(f"[DEBUG] Cleaned body text for {url}:", file=sys.stderr)
-            print(document, file=sys.stderr)
-            print("-" * 80, file=sys.stderr)
-
-        # Skip LLM inference if the fetched body text is empty.
-        if not document.strip():
-            if debug:
-                print(f"[DEBUG] No body text for {url}, skipping LLM inference.", file=sys.stderr)
-            continue
-
-        summary = summarize(document, url)
-        if debug:
-            print(f"[DEBUG] Bullet‑point summary for {url}:", file=sys.stderr)
-            print(summary, file=sys.stderr)
-            print("-" * 80, file=sys.stderr)
-
-        summaries[url] = summary
+    # Fetch and summarize all URLs concurrently.
+    llm_slots = args.slots or get_llm_slots()
+    if debug:
+        print(f"[DEBUG] Summarizing with up to {llm_slots} concurrent requests", file=sys.stderr)
+    summaries = asyncio.run(summarize_urls(urls, llm_slots, debug))
 
     # Reconcile all summaries into a single output.
-    final_summary = reconcile(summaries)
+    final_summary = asyncio.run(reconcile(summaries, llm_slots, args.reconcile_budget, debug))
 
     print(final_summary)
 
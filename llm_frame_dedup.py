@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate frame suppression for llm-video-analysis.bash and llm-ffmpeg-edit.bash.
+
+Frames extracted at a fixed rate from a static shot are nearly identical, and
+sending all of them to the vision model wastes calls and context. Each frame
+is reduced to a 32x32 grayscale thumbnail and compared with the last kept
+frame by SSIM over 8x8 windows. The worst window counts, so a caption or a
+small on-screen change is enough to keep a frame. A frame is dropped when
+that score is at least --threshold. Comparing against the last kept frame
+rather than the previous one means a slow pan or fade still produces a new
+frame once it has drifted far enough.
+
+Dropped frames are moved to <frame_dir>/duplicates/. The kept frames keep
+their frame_XXXXXXXX.jpg names, so their frame numbers and timestamps do not
+change. <frame_dir>/frame_ranges.tsv records which frames each kept frame
+stands for:
+
+    frame_00000012.jpg  12  30  5.500  15.000
+
+Run with --annotate to print a note describing the skipped ranges of the
+given frames, for the scripts to add to the vision prompt.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+
+from PIL import Image
+
+THUMBNAIL_SIZE = 32
+SSIM_WINDOW = 8
+# Frames at least this similar (worst-window SSIM) to the last kept frame are dropped.
+THRESHOLD = 0.95
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+# Keep a frame at least this often even if nothing seems to change.
+MAX_SKIP_SECONDS = 30
+FRAME_RATE = 2
+RANGES_FILE = "frame_ranges.tsv"
+DUPLICATES_DIR = "duplicates"
+
+
+def frame_number(path):
+    """Returns N for a frame_N.jpg path."""
+    match = re.search(r"frame_(\d+)\.jpg$", path)
+    if not match:
+        raise ValueError(f"not a frame_N.jpg file: {path}")
+    return int(match.group(1))
+
+
+def list_frames(frame_dir):
+    """Returns the frame_N.jpg files in frame_dir ordered by frame number."""
+    names = [name for name in os.listdir(frame_dir) if re.fullmatch(r"frame_\d+\.jpg", name)]
+    return sorted((os.path.join(frame_dir, name) for name in names), key=frame_number)
+
+
+def thumbnail(path, size=THUMBNAIL_SIZE):
+    """Returns the grayscale pixels of a size x size box-filtered thumbnail."""
+    with Image.open(path) as image:
+        return list(image.convert("L").resize((size, size), Image.BOX).tobytes())
+
+
+def similarity(a, b, size=THUMBNAIL_SIZE, window=SSIM_WINDOW):
+    """Returns the lowest SSIM over the window x window blocks of two thumbnails."""
+    worst = 1.0
+    count = window * window
+    for top in range(0, size, window):
+        for left in range(0, size, window):
+            xs = [a[(top + y) * size + left + x] for y in range(window) for x in range(window)]
+            ys = [b[(top + y) * size + left + x] for y in range(window) for x in range(window)]
+            mean_x = sum(xs) / count
+            mean_y = sum(ys) / count
+            var_x = sum((v - mean_x) ** 2 for v in xs) / count
+            var_y = sum((v - mean_y) ** 2 for v in ys) / count
+            cov = sum((u - mean_x) * (v - mean_y) for u, v in zip(xs, ys)) / count
+            ssim = (((2 * mean_x * mean_y + SSIM_C1) * (2 * cov + SSIM_C2))
+                    / ((mean_x ** 2 + mean_y ** 2 + SSIM_C1) * (var_x + var_y + SSIM_C2)))
+            worst = min(worst, ssim)
+    return worst
+
+
+def dedup_frames(frames, threshold=THRESHOLD, max_skip_frames=None):
+    """
+    Groups frames into runs of near-identical consecutive frames.
+
+    Returns a list of (kept_frame, dropped_frames) in frame order. A run
+    never covers more than max_skip_frames frames.
+    """
+    runs = []
+    kept = None
+    for path in frames:
+        pixels = thumbnail(path)
+        if (runs and similarity(kept, pixels) >= threshold
+                and (max_skip_frames is None or len(runs[-1][1]) + 1 < max_skip_frames)):
+            runs[-1][1].append(path)
+        else:
+            runs.append((path, []))
+            kept = pixels
+    return runs
+
+
+def frame_time(number, frame_rate):
+    """Returns the second at which frame N (1-based, fixed rate) starts."""
+    return (number - 1) / frame_rate
+
+
+def write_ranges(frame_dir, runs, frame_rate, last_frame):
+    """Writes frame_ranges.tsv; each kept frame covers frames up to the next kept one."""
+    with open(os.path.join(frame_dir, RANGES_FILE), "w", encoding="utf-8") as f:
+        for index, (kept, _) in enumerate(runs):
+            first = frame_number(kept)
+            last = frame_number(runs[index + 1][0]) - 1 if index + 1 < len(runs) else last_frame
+            f.write(f"{os.path.basename(kept)}\t{first}\t{last}\t"
+                    f"{frame_time(first, frame_rate):.3f}\t{frame_time(last + 1, frame_rate):.3f}\n")
+
+
+def read_ranges(frame_dir):
+    """Returns {frame file name: (first, last, start_s, end_s)} from frame_ranges.tsv."""
+    ranges = {}
+    with open(os.path.join(frame_dir, RANGES_FILE), "r", encoding="utf-8") as f:
+        for line in f:
+            name, first, last, start, end = line.rstrip("\n").split("\t")
+            ranges[name] = (int(first), int(last), float(start), float(end))
+    return ranges
+
+
+def annotation(frame_dir, frames):
+    """Returns a prompt note listing the kept frames among *frames* that stand for skipped ones."""
+    ranges = read_ranges(frame_dir)
+    notes = []
+    for path in frames:
+        first, last, start, end = ranges.get(os.path.basename(path), (None, None, None, None))
+        if first is not None and last > first:
+            notes.append(f"frame {first} covers frames {first}-{last} ({start:.1f}s-{end:.1f}s)")
+    if not notes:
+        return ""
+    return ("Near-identical consecutive frames were left out; each frame shown stands for the unchanged frames after it: "
+            + "; ".join(notes) + ".")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop near-identical consecutive frames before sending them to a vision model.")
+    parser.add_argument("frame_dir", help="Directory holding frame_XXXXXXXX.jpg files")
+    parser.add_argument("frames", nargs="*", help="With --annotate: the frames that will be sent together")
+    parser.add_argument("--frame-rate", type=float, default=FRAME_RATE, help=f"Rate the frames were extracted at (default: {FRAME_RATE})")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"SSIM (0-1) to the last kept frame at which a frame counts as a duplicate (default: {THRESHOLD})")
+    parser.add_argument("--max-skip", type=float, default=MAX_SKIP_SECONDS, help=f"Keep at least one frame every this many seconds (default: {MAX_SKIP_SECONDS})")
+    parser.add_argument("--annotate", action="store_true", help="Print the skipped-range note for the given frames instead of deduplicating")
+    args = parser.parse_args()
+
+    if args.annotate:
+        try:
+            print(annotation(args.frame_dir, args.frames))
+        except OSError:
+            # No frame_ranges.tsv: the frames were not deduplicated.
+            print("")
+        return
+
+    frames = list_frames(args.frame_dir)
+    if not frames:
+        print(f"Error: No frames found in '{args.frame_dir}'.", file=sys.stderr)
+        sys.exit(1)
+
+    runs = dedup_frames(frames, args.threshold, max(1, int(args.max_skip * args.frame_rate)))
+    duplicates_dir = os.path.join(args.frame_dir, DUPLICATES_DIR)
+    os.makedirs(duplicates_dir, exist_ok=True)
+    for _, dropped in runs:
+        for path in dropped:
+            shutil.move(path, os.path.join(duplicates_dir, os.path.basename(path)))
+    write_ranges(args.frame_dir, runs, args.frame_rate, frame_number(frames[-1]))
+    print(f"Kept {len(runs)} of {len(frames)} frames; moved {len(frames) - len(runs)} near-duplicates to {duplicates_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Per-host politeness scheduler shared by the scraper scripts.
+
+Requests run with high overall parallelism, but each host gets a bounded
+number of concurrent requests and a minimum spacing between request starts.
+A 429 or 503 response with a Retry-After header pauses only that host, and
+the request is retried once the host is available again. Pages that are
+fresh in llm_http_cache never touch the network and skip the host limits.
+
+HostScheduler is for thread-based scripts (requests) and AsyncHostScheduler
+for asyncio scripts (httpx.AsyncClient). Both have map()/as_completed-style
+helpers that yield results as soon as each page is done.
+"""
+
+import asyncio
+import email.utils
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from llm_http_cache import CACHE_DIR, CachedResponse, cached_fresh, fetch, fetch_async
+
+# Concurrent requests allowed to one host.
+PER_HOST_CONCURRENCY = 2
+# Minimum seconds between the starts of two requests to one host.
+MIN_INTERVAL = 0.5
+# Concurrent requests across all hosts.
+GLOBAL_CONCURRENCY = 32
+# Retries after a 429/503 response.
+MAX_RETRIES = 3
+# Longest Retry-After honoured; longer waits fail the request instead.
+MAX_RETRY_AFTER = 120
+RETRY_STATUSES = {429, 503}
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def retry_after_seconds(headers, default: float) -> float:
+    """Parse a Retry-After header (seconds or HTTP date), or return *default*."""
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class _HostState:
+    """Rate-limit bookkeeping shared by the sync and async schedulers."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.next_start: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, host: str) -> float:
+        """Reserve the next start time for *host*; return seconds to wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, 0.0))
+            self.next_start[host] = start + self.min_interval
+            return start - now
+
+    def pause(self, host: str, seconds: float) -> None:
+        """Keep every request to *host* from starting for *seconds*."""
+        with self.lock:
+            self.next_start[host] = max(self.next_start.get(host, 0.0), time.monotonic() + seconds)
+
+
+class HostScheduler:
+    """Thread-based scheduler wrapping llm_http_cache.fetch()."""
+
+    def __init__(
+        self,
+        per_host: int = PER_HOST_CONCURRENCY,
+        min_interval: float = MIN_INTERVAL,
+        global_limit: int = GLOBAL_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.per_host = per_host
+        self.global_limit = global_limit
+        self.max_retries = max_retries
+        self.state = _HostState(min_interval)
+        self.host_slots: Dict[str, threading.Semaphore] = {}
+        self.global_slots = threading.Semaphore(global_limit)
+        self.lock = threading.Lock()
+
+    def _host_slot(self, host: str) -> threading.Semaphore:
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.Semaphore(self.per_host)
+            return self.host_slots[host]
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30,
+              cache_dir: str = CACHE_DIR) -> CachedResponse:
+        """Fetch *url* through the cache while respecting the host limits.
+
+        Raises requests.exceptions.RequestException like llm_http_cache.fetch().
+        """
+        cached = cached_fresh(url, cache_dir)
+        if cached is not None:
+            return cached
+
+        host = host_of(url)
+        for attempt in range(self.max_retries + 1):
+            # Wait for the host's turn before taking one of the global slots.
+            with self._host_slot(host):
+                time.sleep(self.state.reserve(host))
+                with self.global_slots:
+                    try:
+                        return fetch(url, headers=headers, timeout=timeout, cache_dir=cache_dir)
+                    except requests.exceptions.HTTPError as e:
+                        response = e.response
+                        if response is None or response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                            raise
+                        delay = retry_after_seconds(response.headers, default=2 ** attempt)
+                        if delay > MAX_RETRY_AFTER:
+                            raise
+                        self.state.pause(host, delay)
+        raise RuntimeError("unreachable")
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """Run *func* over *items* on the global pool and yield (item, result) as each finishes.
+
+        *func* should fetch through self.fetch() so host limits apply. If it
+        raises, the exception is yielded in place of the result.
+        """
+        with ThreadPoolExecutor(max_workers=self.global_limit) as pool:
+            futures = {pool.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+
+class AsyncHostScheduler:
+    """asyncio scheduler wrapping llm_http_cache.fetch_async()."""
+
+    def __init__(
+        self,
+        per_host: int = PER_HOST_CONCURRENCY,
+        min_interval: float = MIN_INTERVAL,
+        global_limit: int = GLOBAL_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.per_host = per_host
+        self.global_limit = global_limit
+        self.max_retries = max_retries
+        self.state = _HostState(min_interval)
+        self.host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.global_slots = asyncio.Semaphore(global_limit)
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self.host_slots[host]
+
+    async def fetch(self, http, url: str, headers: Optional[Dict[str, str]] = None,
+                    cache_dir: str = CACHE_DIR) -> CachedResponse:
+        """Fetch *url* with *http* (an httpx.AsyncClient) through the cache while respecting the host limits.
+
+        Raises httpx.HTTPError like llm_http_cache.fetch_async().
+        """
+        cached = await asyncio.to_thread(cached_fresh, url, cache_dir)
+        if cached is not None:
+            return cached
+
+        import httpx  # only the async scheduler needs httpx
+
+        host = host_of(url)
+        for attempt in range(self.max_retries + 1):
+            async with self._host_slot(host):
+                await asyncio.sleep(self.state.reserve(host))
+                async with self.global_slots:
+                    try:
+                        return await fetch_async(http, url, headers=headers, cache_dir=cache_dir)
+                    except httpx.HTTPStatusError as e:
+                        if e.response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                            raise
+                        delay = retry_after_seconds(e.response.headers, default=2 ** attempt)
+                        if delay > MAX_RETRY_AFTER:
+                            raise
+                        self.state.pause(host, delay)
+        raise RuntimeError("unreachable")
+
+    async def map(self, func: Callable[[Any], Any], items: Iterable[Any]) -> AsyncIterator[Tuple[Any, Any]]:
+        """Await *func(item)* for all items concurrently and yield (item, result) as each finishes.
+
+        If *func* raises, the exception is yielded in place of the result.
+        """
+        async def run(item):
+            try:
+                return item, await func(item)
+            except Exception as e:
+                return item, e
+
+        for next_done in asyncio.as_completed([run(item) for item in items]):
+            yield await next_done
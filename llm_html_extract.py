@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Main-content extraction shared by llm-web-bullets.py and llm-rss.py.
+
+Pages are parsed with lxml (C-backed, much faster than BeautifulSoup's
+html.parser) and the article body is located with readability-style scoring:
+paragraph-like blocks add points to their parent and grandparent according to
+their length and comma count, class/id names such as "article" or "sidebar"
+nudge the score up or down, and link-heavy containers are penalised. The best
+container and its similarly scored siblings are returned as plain text, so
+navigation, footers and comment sections are not sent to the LLM.
+
+Run directly to benchmark against the previous BeautifulSoup extraction:
+
+    python llm_html_extract.py --benchmark [<dir-of-html-or-manifest>]
+
+Without an argument the saved pages in fixtures/html are used.
+
+or with --check to run the built-in regression pages.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple, Union
+
+import lxml.html
+from lxml import etree
+
+# Elements that never hold article text.
+DROP_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe",
+             "form", "button", "input", "select", "textarea", "nav", "footer", "aside"]
+# Elements that start a new line in the extracted text.
+BLOCK_TAGS = {"address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+              "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol", "p", "pre",
+              "section", "table", "td", "th", "tr", "ul"}
+# Subtrees left out of the extracted text.
+BOILERPLATE_TAGS = {"nav", "aside", "footer"}
+SCORED_TAGS = {"p", "pre", "td", "blockquote"}
+POSITIVE_RE = re.compile(r"article|body|content|entry|main|page|post|story|text|blog", re.I)
+NEGATIVE_RE = re.compile(
+    r"comment|footer|footnote|header|menu|nav|sidebar|share|social|sponsor|promo|"
+    r"related|advert|\bad\b|ad-|banner|popup|modal|cookie|newsletter|subscribe|widget",
+    re.I,
+)
+UNLIKELY_RE = re.compile(r"comment|footer|menu|nav|sidebar|share|social|cookie|newsletter|popup|modal", re.I)
+MAYBE_RE = re.compile(r"and|article|body|column|main|content|story", re.I)
+MIN_PARAGRAPH_CHARS = 25
+# Extractions shorter than this fall back to the text of the whole body.
+MIN_ARTICLE_CHARS = 250
+# Lists whose text is mostly links ("Related", "More stories") are boilerplate.
+LINK_LIST_DENSITY = 0.5
+# Siblings of the top candidate are kept when they score at least this fraction of it.
+SIBLING_SCORE_RATIO = 0.2
+CHARS_PER_TOKEN = 4
+UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+BENCHMARK_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+
+def _text(element) -> str:
+    return re.sub(r"\s+", " ", element.text_content()).strip()
+
+
+def _class_weight(element) -> int:
+    weight = 0
+    for name in (element.get("class"), element.get("id")):
+        if name:
+            if NEGATIVE_RE.search(name):
+                weight -= 25
+            if POSITIVE_RE.search(name):
+                weight += 25
+    return weight
+
+
+def _link_density(element, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_length = sum(len(_text(link)) for link in element.iter("a"))
+    return link_length / text_length
+
+
+def _clean(root) -> None:
+    """Remove elements that can never be part of the main content."""
+    etree.strip_elements(root, etree.Comment, with_tail=False)
+    for element in root.xpath("//" + " | //".join(DROP_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+    for element in list(root.iter("div", "section", "header", "ul", "table")):
+        names = f"{element.get('class', '')} {element.get('id', '')}"
+        if UNLIKELY_RE.search(names) and not MAYBE_RE.search(names) and element.getparent() is not None:
+            element.drop_tree()
+
+
+def _best_candidate(root):
+    """Return (element, score, scores) for the highest scoring container.
+
+    *element* is None and *score* 0 when no paragraph scored; *scores* maps
+    every scored container to its link-density adjusted score.
+    """
+    scores: Dict = {}
+    for paragraph in root.iter(*SCORED_TAGS):
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        points = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for ancestor, share in ((parent, 1.0), (grandparent, 0.5)):
+            if ancestor is None:
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = _class_weight(ancestor) + (5 if ancestor.tag in ("div", "article", "main") else 0)
+            scores[ancestor] += points * share
+
+    best, best_score = None, 0.0
+    for element, score in scores.items():
+        score *= 1 - _link_density(element, len(_text(element)))
+        scores[element] = score
+        if score > best_score:
+            best, best_score = element, score
+    return best, best_score, scores
+
+
+def _is_boilerplate(element) -> bool:
+    if element.tag in BOILERPLATE_TAGS:
+        return True
+    if element.tag in ("ul", "ol"):
+        text_length = len(_text(element))
+        return bool(text_length) and _link_density(element, text_length) > LINK_LIST_DENSITY
+    return False
+
+
+def _block_text(element) -> str:
+    """Return all text under *element*, one line per block, without boilerplate subtrees.
+
+    Text directly inside divs and the tails of inline elements are kept, so
+    articles built from plain <div>s or loose text are not lost.
+    """
+    lines = []
+    current = []
+
+    def flush():
+        line = re.sub(r"\s+", " ", "".join(current)).strip()
+        if line:
+            lines.append(line)
+        current.clear()
+
+    def walk(node):
+        if isinstance(node.tag, str) and not _is_boilerplate(node):
+            block = node.tag in BLOCK_TAGS
+            if block:
+                flush()
+            if node.text:
+                current.append(node.text)
+            for child in node:
+                walk(child)
+                if child.tail:
+                    current.append(child.tail)
+            if block:
+                flush()
+
+    walk(element)
+    flush()
+    return "\n".join(lines)
+
+
+def extract(html: Union[str, bytes]) -> Tuple[str, str]:
+    """Return (title, main_text) for an HTML document.
+
+    Falls back to the text of the whole body when no content block scores or
+    the extracted text is shorter than MIN_ARTICLE_CHARS.
+    """
+    if not html or not html.strip():
+        return "", ""
+    try:
+        if isinstance(html, str):
+            # lxml rejects str input with an XML encoding declaration.
+            root = lxml.html.fromstring(html.encode("utf-8"), parser=UTF8_PARSER)
+        else:
+            root = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return "", ""
+
+    title_element = root.find(".//title")
+    title = _text(title_element) if title_element is not None else ""
+
+    _clean(root)
+    body = root.find(".//body")
+    if body is None:
+        body = root
+    best, best_score, scores = _best_candidate(root)
+    if best is None:
+        return title, _block_text(body)
+
+    parts = [best]
+    parent = best.getparent()
+    if parent is not None:
+        threshold = max(10.0, best_score * SIBLING_SCORE_RATIO)
+        parts = []
+        for sibling in parent:
+            if sibling is best or scores.get(sibling, 0) >= threshold:
+                parts.append(sibling)
+            elif sibling.tag == "p":
+                text = _text(sibling)
+                if len(text) > 80 and _link_density(sibling, len(text)) < 0.25:
+                    parts.append(sibling)
+    text = "\n".join(text for text in (_block_text(part) for part in parts) if text)
+    if len(text) < MIN_ARTICLE_CHARS:
+        full_text = _block_text(body)
+        if len(full_text) > len(text):
+            return title, full_text
+    return title, text
+
+
+def extract_text(html: Union[str, bytes]) -> str:
+    """Return only the main text of an HTML document."""
+    return extract(html)[1]
+
+
+# (name, html, text that must be extracted, text that must not be)
+_ARTICLE = "The council approved the new budget on Tuesday, after a debate that ran late into the night. "
+REGRESSION_CASES = [
+    (
+        "div text and loose text under the candidate",
+        "<html><body><nav><a href=/>Home</a></nav><div class=article-body>"
+        "<div>Intro paragraph written in a plain div.</div><p>" + _ARTICLE * 2 + "</p>"
+        "Loose text between paragraphs.<p>" + _ARTICLE + "</p></div>"
+        "<footer>Copyright</footer></body></html>",
+        ["Intro paragraph written in a plain div.", "Loose text between paragraphs.", _ARTICLE.strip()],
+        ["Home", "Copyright"],
+    ),
+    (
+        "div-only article with a related-links list",
+        "<html><body><div class=story><div>" + _ARTICLE * 3 + "</div><div>" + _ARTICLE + "</div></div>"
+        "<ul><li><a href=/a>Related link</a></li><li><a href=/b>Another story</a></li></ul></body></html>",
+        [_ARTICLE.strip()],
+        ["Related link", "Another story"],
+    ),
+    (
+        "short candidate falls back to the body",
+        "<html><body><div>" + _ARTICLE * 4 + "</div><div class=content><p>A short scored paragraph, "
+        "with a comma.</p></div></body></html>",
+        [_ARTICLE.strip(), "A short scored paragraph, with a comma."],
+        [],
+    ),
+]
+
+
+def run_checks() -> bool:
+    """Run extract() on REGRESSION_CASES and report each; returns True when all pass."""
+    ok = True
+    for name, html, present, absent in REGRESSION_CASES:
+        text = extract_text(html)
+        problems = [f"missing {s!r}" for s in present if s not in text]
+        problems += [f"unexpected {s!r}" for s in absent if s in text]
+        print(f"{'FAIL' if problems else 'ok':4} {name}" + "".join(f"\n       {p}" for p in problems))
+        ok = ok and not problems
+    return ok
+
+
+def _bs4_body_text(html: str) -> str:
+    """Previous llm-web-bullets.py extraction: the whole <body> via html.parser."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.body:
+        return soup.body.get_text(separator="\n", strip=True)
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _bs4_article_text(html: str) -> str:
+    """Previous llm-rss.py extraction: <article>, common containers, else <body>."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    article = soup.find("article")
+    if article:
+        return article.get_text(strip=True)
+    for selector in ["div.article-body", "div.story-content", "div.post-content", "div.entry-content"]:
+        element = soup.select_one(selector)
+        if element:
+            return element.get_text(strip=True)
+    body = soup.find("body")
+    return body.get_text(strip=True) if body else ""
+
+
+def _load_fixture(entry: str) -> Optional[str]:
+    if os.path.isfile(entry):
+        with open(entry, "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+    from llm_http_cache import fetch
+    try:
+        return fetch(entry).text
+    except Exception as e:
+        print(f"{entry[:40]:40} skipped: {e}")
+        return None
+
+
+def _iter_fixtures(source: str):
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith((".html", ".htm")):
+                    yield os.path.join(root, name)
+        return
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def _expected_text(entry: str) -> Optional[str]:
+    """Return the expected main text saved next to a local fixture as <name>.txt, or None."""
+    path = os.path.splitext(entry)[0] + ".txt"
+    if not os.path.isfile(entry) or not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _recall(expected: str, text: str) -> float:
+    """Fraction of the expected words (with multiplicity) present in *text*."""
+    expected_words = Counter(expected.split())
+    total = sum(expected_words.values())
+    return sum((expected_words & Counter(text.split())).values()) / total if total else 1.0
+
+
+def run_benchmark(source: str = BENCHMARK_FIXTURES, repeat: int = 3) -> None:
+    """Compare extraction time, estimated token count and recall on a fixture set.
+
+    *source* is a directory of saved .html pages or a manifest of paths/URLs.
+    Recall is the fraction of the expected article words found, for fixtures
+    with a <name>.txt next to them; fewer tokens at full recall means less
+    boilerplate sent to the LLM.
+    """
+    extractors = {"bs4-body": _bs4_body_text, "bs4-article": _bs4_article_text, "lxml-main": extract_text}
+    totals = {name: [0.0, 0, []] for name in extractors}
+    header = " ".join(f"{name + ' ms':>14} {'tokens':>7} {'recall':>6}" for name in extractors)
+    print(f"{'page':32} {header}")
+    pages = 0
+    for entry in _iter_fixtures(source):
+        html = _load_fixture(entry)
+        if html is None:
+            continue
+        expected = _expected_text(entry)
+        pages += 1
+        row = []
+        for name, func in extractors.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                text = func(html)
+            elapsed = (time.perf_counter() - start) / repeat
+            tokens = len(text) // CHARS_PER_TOKEN
+            totals[name][0] += elapsed
+            totals[name][1] += tokens
+            recall = "-"
+            if expected is not None:
+                totals[name][2].append(_recall(expected, text))
+                recall = f"{totals[name][2][-1]:.0%}"
+            row.append(f"{elapsed * 1000:14.1f} {tokens:7d} {recall:>6}")
+        print(f"{os.path.basename(entry.rstrip('/'))[:32]:32} {' '.join(row)}")
+
+    if not pages:
+        print("No pages benchmarked.")
+        return
+    print(f"\nTotal over {pages} pages:")
+    for name, (elapsed, tokens, recalls) in totals.items():
+        recall = f", recall {sum(recalls) / len(recalls):.1%}" if recalls else ""
+        print(f"  {name:12} {elapsed * 1000 / pages:8.1f} ms/page {tokens / pages:9.0f} tokens/page{recall}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the main text of an HTML page, or benchmark the extractor.")
+    parser.add_argument("source", nargs="?", help="HTML file or URL to extract")
+    parser.add_argument("--benchmark", metavar="SOURCE", nargs="?", const=BENCHMARK_FIXTURES, help="Directory of .html fixtures or manifest of paths/URLs to benchmark against the BeautifulSoup extraction (default: the bundled fixtures/html)")
+    parser.add_argument("--check", action="store_true", help="Run the built-in regression pages and exit non-zero on failure")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per page for --benchmark (default: 3)")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if run_checks() else 1)
+    elif args.benchmark:
+        run_benchmark(args.benchmark, args.repeat)
+    elif args.source:
+        html = _load_fixture(args.source)
+        if html is None:
+            sys.exit(1)
+        title, text = extract(html)
+        print(f"{title}\n\n{text}")
+    else:
+        parser.error("an HTML file/URL, --benchmark or --check is required")
+
+
+if __name__ == "__main__":
+    main()
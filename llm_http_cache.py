@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk HTTP page cache for the scraper scripts.
+
+Responses are keyed by URL and honour Cache-Control (max-age, no-cache,
+no-store) and Expires. Stale entries are revalidated with If-None-Match /
+If-Modified-Since, so an unchanged page costs a 304 instead of a full
+download. Bodies are stored brotli-compressed when the brotli module is
+installed and gzip-compressed otherwise. The cache is capped in size and the
+least recently used entries are evicted first.
+
+Synchronous callers go through fetch(), which keeps one pooled
+requests.Session per host. Async callers pass their own httpx.AsyncClient
+to fetch_async().
+"""
+
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_DIR = os.getenv(
+    "LLM_HTTP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "llm-scripts", "http"),
+)
+MAX_CACHE_BYTES = int(os.getenv("LLM_HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Pages with only a Last-Modified header are treated as fresh for 10% of
+# their age (RFC 9111 heuristic), but never longer than this.
+MAX_HEURISTIC_TTL = 24 * 60 * 60
+USER_AGENT = "llm-scripts/1.0"
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_evict_lock = threading.Lock()
+
+
+class CachedResponse:
+    """A minimal response object for both fresh downloads and cache hits."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, from_cache: bool):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def encoding(self) -> str:
+        match = re.search(r"charset=([\w.:-]+)", self.headers.get("content-type", ""), re.I)
+        return match.group(1) if match else "utf-8"
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the pooled session for the host of *url*."""
+    host = urlsplit(url).netloc.lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            _sessions[host] = session
+        return session
+
+
+def _cache_paths(url: str, cache_dir: str):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.body"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _compress(data: bytes):
+    if brotli is not None:
+        return brotli.compress(data, quality=5), "br"
+    return gzip.compress(data, compresslevel=6), "gzip"
+
+
+def _decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        if brotli is None:
+            raise ValueError("cache entry is brotli-compressed but brotli is not installed")
+        return brotli.decompress(data)
+    return gzip.decompress(data)
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _freshness_lifetime(headers: Dict[str, str], now: float) -> float:
+    """Return how many seconds a response stays fresh after it was stored."""
+    directives = _parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in directives:
+        return 0
+    if directives.get("max-age"):
+        try:
+            return max(0, int(directives["max-age"]))
+        except ValueError:
+            return 0
+    date = _parse_http_date(headers.get("date")) or now
+    expires = _parse_http_date(headers.get("expires"))
+    if headers.get("expires") is not None:
+        return max(0, expires - date) if expires else 0
+    last_modified = _parse_http_date(headers.get("last-modified"))
+    if last_modified:
+        return min(max(0, (date - last_modified) / 10), MAX_HEURISTIC_TTL)
+    return 0
+
+
+def _load(url: str, cache_dir: str):
+    """Return (meta, body) for a cached entry, or (None, None)."""
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = _decompress(f.read(), meta["encoding"])
+    except (OSError, ValueError, KeyError):
+        return None, None
+    # Touch the entry so eviction sees it as recently used.
+    try:
+        os.utime(meta_path)
+    except OSError:
+        pass
+    return meta, body
+
+
+def _write_atomic(path: str, data: bytes, cache_dir: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _save_meta(meta: Dict[str, Any], url: str, cache_dir: str) -> None:
+    _, meta_path = _cache_paths(url, cache_dir)
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"), cache_dir)
+
+
+def _store(url: str, status_code: int, headers: Dict[str, str], body: bytes, cache_dir: str) -> None:
+    """Store a 200 response unless Cache-Control forbids it."""
+    if status_code != 200 or "no-store" in _parse_cache_control(headers.get("cache-control", "")):
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, _ = _cache_paths(url, cache_dir)
+    data, encoding = _compress(body)
+    _write_atomic(body_path, data, cache_dir)
+    now = time.time()
+    _save_meta({
+        "url": url,
+        "stored_at": now,
+        "fresh_for": _freshness_lifetime(headers, now),
+        "encoding": encoding,
+        "size": len(data),
+        "headers": {k: v for k, v in headers.items()
+                    if k in ("content-type", "etag", "last-modified", "cache-control", "expires", "date")},
+    }, url, cache_dir)
+    evict(cache_dir)
+
+
+def _revalidated(meta: Dict[str, Any], headers: Dict[str, str], url: str, cache_dir: str) -> None:
+    """Refresh a cache entry after a 304 response."""
+    merged = dict(meta["headers"])
+    merged.update({k: v for k, v in headers.items() if k in merged or k in ("etag", "cache-control", "expires", "date")})
+    now = time.time()
+    meta.update(headers=merged, stored_at=now, fresh_for=_freshness_lifetime(merged, now))
+    _save_meta(meta, url, cache_dir)
+
+
+def evict(cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> None:
+    """Delete least recently used entries until the cache fits in *max_bytes*."""
+    with _evict_lock:
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(cache_dir, name)
+            body_path = meta_path[:-len(".json")] + ".body"
+            try:
+                size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+                used = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            entries.append((used, size, meta_path, body_path))
+            total += size
+        if total <= max_bytes:
+            return
+        for _, size, meta_path, body_path in sorted(entries):
+            for path in (meta_path, body_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+            if total <= max_bytes:
+                break
+
+
+def _conditional_headers(meta: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    request_headers = dict(headers or {})
+    if meta:
+        if meta["headers"].get("etag"):
+            request_headers["If-None-Match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            request_headers["If-Modified-Since"] = meta["headers"]["last-modified"]
+    return request_headers
+
+
+def _is_fresh(meta: Dict[str, Any]) -> bool:
+    return time.time() - meta["stored_at"] < meta["fresh_for"]
+
+
+def cached_fresh(url: str, cache_dir: str = CACHE_DIR) -> Optional[CachedResponse]:
+    """Return the cached response for *url* if it is still fresh, without any network access."""
+    meta, body = _load(url, cache_dir)
+    if meta and _is_fresh(meta):
+        return CachedResponse(url, 200, meta["headers"], body, from_cache=True)
+    return None
+
+
+def fetch(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30,
+          cache_dir: str = CACHE_DIR) -> CachedResponse:
+    """GET *url* through the cache.
+
+    Raises requests.exceptions.RequestException on network and HTTP errors,
+    like requests.get(...).raise_for_status() would.
+    """
+    meta, body = _load(url, cache_dir)
+    if meta and _is_fresh(meta):
+        return CachedResponse(url, 200, meta["headers"], body, from_cache=True)
+
+    response = get_session(url).get(url, headers=_conditional_headers(meta, headers), timeout=timeout)
+    response_headers = {k.lower(): v for k, v in response.headers.items()}
+    if response.status_code == 304 and meta:
+        _revalidated(meta, response_headers, url, cache_dir)
+        return CachedResponse(url, 200, meta["headers"], body, from_cache=True)
+    response.raise_for_status()
+    _store(url, response.status_code, response_headers, response.content, cache_dir)
+    return CachedResponse(response.url, response.status_code, response_headers, response.content, from_cache=False)
+
+
+async def fetch_async(http, url: str, headers: Optional[Dict[str, str]] = None,
+                      cache_dir: str = CACHE_DIR) -> CachedResponse:
+    """GET *url* through the cache using the given httpx.AsyncClient.
+
+    Raises httpx.HTTPError on network and HTTP errors. Disk access and
+    compression run in a worker thread so the event loop is not blocked.
+    """
+    meta, body = await asyncio.to_thread(_load, url, cache_dir)
+    if meta and _is_fresh(meta):
+        return CachedResponse(url, 200, meta["headers"], body, from_cache=True)
+
+    response = await http.get(url, headers=_conditional_headers(meta, headers))
+    response_headers = {k.lower(): v for k, v in response.headers.items()}
+    if response.status_code == 304 and meta:
+        await asyncio.to_thread(_revalidated, meta, response_headers, url, cache_dir)
+        return CachedResponse(url, 200, meta["headers"], body, from_cache=True)
+    response.raise_for_status()
+    await asyncio.to_thread(_store, url, response.status_code, response_headers, response.content, cache_dir)
+    return CachedResponse(str(response.url), response.status_code, response_headers, response.content, from_cache=False)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Batch runner shared by llm-pdf.py and llm-pdf-multimodal.py.
+
+Takes a directory of PDFs (searched recursively) or a manifest file with one
+path or URL per line. PDF extraction runs on a process pool while LLM requests
+run on a separate, bounded thread pool. Each finished document is appended to
+a JSONL file keyed by the SHA-256 of the PDF, so an interrupted run skips the
+documents it already completed when restarted with the same output file.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Set
+
+from llm_pdf_cache import download_pdf, file_sha256
+
+
+def iter_pdf_sources(source: str) -> Iterator[str]:
+    """Yield PDF paths from a directory, or paths/URLs from a manifest file."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    yield os.path.join(root, name)
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """Return the hashes of documents already completed in *output_path*.
+
+    Records with an "error" field are not counted, so failures are retried.
+    A truncated last line from an interrupted run is ignored.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record and record.get("sha256"):
+                completed.add(record["sha256"])
+    return completed
+
+
+def run_batch(
+    source: str,
+    extract: Callable[[str], Any],
+    ask: Callable[[Any], str],
+    output_path: str,
+    extract_workers: int = os.cpu_count() or 1,
+    llm_workers: int = 2,
+) -> None:
+    """Run *extract* and *ask* over every PDF in *source*, appending results to *output_path*.
+
+    *extract* receives a local PDF path and runs in a worker process, so it must
+    be a picklable top-level function (or functools.partial of one). *ask*
+    receives the extraction result and runs in a thread. Extraction is only
+    allowed to run a few documents ahead of the LLM pool so memory stays bounded.
+    """
+    completed = load_completed(output_path)
+    if completed:
+        print(f"Resuming: {len(completed)} documents already in {output_path}", file=sys.stderr)
+
+    def pending_jobs() -> Iterator[Dict[str, str]]:
+        for entry in iter_pdf_sources(source):
+            try:
+                path = download_pdf(entry)
+                sha256 = file_sha256(path)
+            except OSError as e:
+                print(f"Warning: Skipping {entry}: {e}", file=sys.stderr)
+                continue
+            if sha256 in completed:
+                continue
+            completed.add(sha256)
+            yield {"source": entry, "path": path, "sha256": sha256}
+
+    jobs = pending_jobs()
+    exhausted = False
+    extracting: Dict[Any, Dict[str, str]] = {}
+    asking: Dict[Any, Dict[str, str]] = {}
+    processed = 0
+    start = time.time()
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=llm_workers) as llm_pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+
+        def write_record(job: Dict[str, str], **fields) -> None:
+            record = {"sha256": job["sha256"], "source": job["source"], **fields}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        while True:
+            # Keep the extraction pool busy, but never more than a couple of
+            # documents ahead of what the LLM pool can absorb.
+            while (not exhausted and len(extracting) < extract_workers * 2
+                   and len(asking) < llm_workers * 2):
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                extracting[cpu_pool.submit(extract, job["path"])] = job
+
+            if not extracting and not asking:
+                break
+
+            done, _ = wait(list(extracting) + list(asking), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    job = extracting.pop(future)
+                    try:
+                        extracted = future.result()
+                    except Exception as e:
+                        write_record(job, error=f"extraction failed: {e}")
+                        continue
+                    asking[llm_pool.submit(ask, extracted)] = job
+                else:
+                    job = asking.pop(future)
+                    try:
+                        write_record(job, result=future.result())
+                    except Exception as e:
+                        write_record(job, error=f"LLM request failed: {e}")
+                    processed += 1
+                    elapsed = time.time() - start
+                    print(f"[{processed}] {job['source']} ({elapsed / processed:.1f}s/doc)", file=sys.stderr)
+
+    print(f"Batch complete: {processed} documents processed, results in {output_path}", file=sys.stderr)
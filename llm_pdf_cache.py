@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local on-disk cache for PDFs used by llm-pdf.py and llm-pdf-multimodal.py.
+
+Downloads are keyed by URL and revalidated with ETag/Last-Modified, so a paper
+that has not changed upstream is served straight from disk. The body is
+streamed to the cache file in chunks instead of being buffered in memory, and
+the cached path can be handed directly to pdfminer and pdftoppm.
+
+Extraction results are cached separately, keyed by the PDF's content hash and
+the extractor settings, so re-running with a different prompt skips layout
+analysis entirely.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from typing import Any, Dict, List, Optional
+
+import requests
+
+CACHE_DIR = os.getenv(
+    "LLM_PDF_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "llm-scripts", "pdf"),
+)
+CHUNK_SIZE = 1024 * 1024
+USER_AGENT = "llm-scripts/1.0"
+
+EXTRACTION_CACHE_DIR = os.path.join(CACHE_DIR, "extracted")
+# Bump when the extraction output changes so stale cache entries are ignored
+EXTRACTION_FORMAT_VERSION = 1
+EXTRACTION_MAGIC = b"LLMPDFX1"
+
+
+class PDFDownloadError(OSError):
+    """Raised when a PDF cannot be downloaded and no cached copy exists."""
+
+
+def _cache_paths(url: str, cache_dir: str):
+    """Return the (pdf_path, meta_path) pair for *url* inside *cache_dir*."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.pdf"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _load_meta(meta_path: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(meta_path: str, meta: Dict[str, str]) -> None:
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def download_pdf(url: str, cache_dir: str = CACHE_DIR, timeout: float = 60) -> str:
+    """Download the PDF at *url* into the cache and return its local path.
+
+    A previously cached copy is revalidated with If-None-Match/If-Modified-Since
+    and reused on a 304 response. If the server cannot be reached but a cached
+    copy exists, the cached copy is used. Local file paths are returned as-is.
+
+    Raises PDFDownloadError if the download fails and nothing is cached.
+    """
+    if os.path.isfile(url):
+        return url
+
+    os.makedirs(cache_dir, exist_ok=True)
+    pdf_path, meta_path = _cache_paths(url, cache_dir)
+    meta = _load_meta(meta_path) if os.path.exists(pdf_path) else None
+
+    headers = {"User-Agent": USER_AGENT}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304 and meta:
+                return pdf_path
+            response.raise_for_status()
+
+            fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=cache_dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                os.replace(tmp_path, pdf_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            _save_meta(meta_path, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            })
+            return pdf_path
+    except requests.exceptions.RequestException as e:
+        if meta:
+            print(f"Warning: Could not revalidate PDF ({e}); using cached copy.", file=sys.stderr)
+            return pdf_path
+        raise PDFDownloadError(f"Error downloading PDF: {e}") from e
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of the file at *path*."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extraction_path(pdf_sha256: str, settings: Dict[str, Any], cache_dir: str) -> str:
+    key_source = json.dumps(
+        {"pdf": pdf_sha256, "settings": settings, "version": EXTRACTION_FORMAT_VERSION},
+        sort_keys=True,
+    )
+    key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.bin")
+
+
+def _pack_items(items: List[Dict[str, Any]]) -> bytes:
+    """Serialize items to a header + blob layout.
+
+    Binary values (image and table data) are stored raw after a compressed
+    JSON header that records their offsets; everything else lives in the header.
+    """
+    header = []
+    blobs = []
+    offset = 0
+    for item in items:
+        entry = {}
+        for key, value in item.items():
+            if isinstance(value, (bytes, bytearray)):
+                entry[key] = {"__blob__": [offset, len(value)]}
+                blobs.append(bytes(value))
+                offset += len(value)
+            else:
+                entry[key] = value
+        header.append(entry)
+    header_bytes = zlib.compress(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+    return EXTRACTION_MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes + b"".join(blobs)
+
+
+def _unpack_items(data: bytes) -> List[Dict[str, Any]]:
+    if not data.startswith(EXTRACTION_MAGIC):
+        raise ValueError("not an extraction cache file")
+    pos = len(EXTRACTION_MAGIC)
+    (header_len,) = struct.unpack_from("<Q", data, pos)
+    pos += 8
+    header = json.loads(zlib.decompress(data[pos:pos + header_len]).decode("utf-8"))
+    blob_base = pos + header_len
+
+    items = []
+    for entry in header:
+        item = {}
+        for key, value in entry.items():
+            if isinstance(value, dict) and "__blob__" in value:
+                start, length = value["__blob__"]
+                item[key] = data[blob_base + start:blob_base + start + length]
+            else:
+                item[key] = value
+        items.append(item)
+    return items
+
+
+def load_extraction(pdf_sha256: str, settings: Dict[str, Any],
+                    cache_dir: str = EXTRACTION_CACHE_DIR) -> Optional[List[Dict[str, Any]]]:
+    """Return cached extraction items for this PDF and settings, or None."""
+    path = _extraction_path(pdf_sha256, settings, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            return _unpack_items(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        print(f"Warning: Ignoring unreadable extraction cache {path}: {e}", file=sys.stderr)
+        return None
+
+
+def save_extraction(pdf_sha256: str, settings: Dict[str, Any], items: List[Dict[str, Any]],
+                    cache_dir: str = EXTRACTION_CACHE_DIR) -> None:
+    """Store extraction items for this PDF and settings."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _extraction_path(pdf_sha256, settings, cache_dir)
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_pack_items(items))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
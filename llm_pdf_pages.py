@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Page selection helpers shared by llm-pdf.py and llm-pdf-multimodal.py.
+
+Page specs use 1-based, comma-separated ranges such as "1-3,7,10-" (an open
+end runs to the last page). Only the selected pages are handed to pdfminer's
+layout analysis. In outline-first mode the LLM is shown the PDF outline and
+the first pages and picks the page ranges needed to answer the question.
+"""
+
+import re
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+from pdfminer.high_level import extract_text
+from pdfminer.pdfdocument import PDFDocument, PDFNoOutlines
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import PSLiteral
+
+PAGE_SPEC_RE = re.compile(r'\d+\s*(?:-\s*\d*)?(?:\s*,\s*\d+\s*(?:-\s*\d*)?)*')
+
+
+def parse_page_ranges(spec: str, page_count: int) -> List[int]:
+    """Return the sorted 0-based page numbers selected by *spec*.
+
+    Raises ValueError for malformed specs. Pages past the end are dropped.
+    """
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)\s*(-\s*(\d*))?', part)
+        if not match:
+            raise ValueError(f"Invalid page range: {part!r}")
+        start = int(match.group(1))
+        if match.group(2) is None:
+            end = start
+        elif match.group(3):
+            end = int(match.group(3))
+        else:
+            end = page_count
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part!r}")
+        pages.update(range(start - 1, min(end, page_count)))
+    return sorted(pages)
+
+
+def format_page_ranges(pagenos: List[int]) -> str:
+    """Format 0-based page numbers as a compact 1-based page spec."""
+    ranges = []
+    for pageno in sorted(set(pagenos)):
+        if ranges and pageno == ranges[-1][1] + 1:
+            ranges[-1][1] = pageno
+        else:
+            ranges.append([pageno, pageno])
+    return ",".join(
+        str(start + 1) if start == end else f"{start + 1}-{end + 1}"
+        for start, end in ranges
+    )
+
+
+def count_pages(pdf_path: str) -> int:
+    """Return the number of pages, walking the page tree without layout analysis."""
+    with open(pdf_path, "rb") as f:
+        document = PDFDocument(PDFParser(f))
+        return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def resolve_pages(pdf_path: str, spec: Optional[str]) -> Optional[List[int]]:
+    """Return the 0-based pages selected by *spec*, or None for all pages."""
+    if not spec:
+        return None
+    return parse_page_ranges(spec, count_pages(pdf_path))
+
+
+def iter_pages(pdf_file, pagenos: Optional[List[int]] = None) -> Iterator[Tuple[int, PDFPage]]:
+    """Yield (page_number, page) for the selected pages of an open PDF file."""
+    if pagenos is None:
+        yield from enumerate(PDFPage.get_pages(pdf_file))
+    else:
+        # get_pages yields the selected pages in document order
+        yield from zip(sorted(pagenos), PDFPage.get_pages(pdf_file, pagenos=set(pagenos)))
+
+
+def _dest_page(document: PDFDocument, dest, action, page_ids) -> Optional[int]:
+    if dest is None and action is not None:
+        action = resolve1(action)
+        if isinstance(action, dict):
+            dest = action.get("D")
+    dest = resolve1(dest)
+    if isinstance(dest, (bytes, str, PSLiteral)):
+        name = dest.name if isinstance(dest, PSLiteral) else dest
+        try:
+            dest = resolve1(document.get_dest(name))
+        except Exception:
+            return None
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get("D"))
+    if isinstance(dest, list) and dest:
+        return page_ids.get(getattr(dest[0], "objid", None))
+    return None
+
+
+def get_outline(pdf_path: str) -> List[Tuple[int, str, Optional[int]]]:
+    """Return the PDF outline as (level, title, 0-based page or None) tuples."""
+    with open(pdf_path, "rb") as f:
+        document = PDFDocument(PDFParser(f))
+        page_ids = {page.pageid: i for i, page in enumerate(PDFPage.create_pages(document))}
+        entries = []
+        try:
+            for level, title, dest, action, _ in document.get_outlines():
+                entries.append((level, title, _dest_page(document, dest, action, page_ids)))
+        except PDFNoOutlines:
+            return []
+        except Exception as e:
+            print(f"Warning: Could not read PDF outline: {e}", file=sys.stderr)
+        return entries
+
+
+def plan_pages(client, model: str, pdf_path: str, question: str, first_pages: int = 2) -> Optional[str]:
+    """Ask the LLM which pages are needed to answer *question*.
+
+    The LLM sees the outline (with page numbers) and the text of the first
+    pages. Returns a page spec that always includes the first pages, or None
+    if the answer could not be parsed, in which case every page should be used.
+    """
+    page_count = count_pages(pdf_path)
+    first_pages = min(first_pages, page_count)
+    outline = get_outline(pdf_path)
+    first_text = extract_text(pdf_path, page_numbers=list(range(first_pages)))
+
+    if outline:
+        outline_text = "\n".join(
+            f"{'  ' * (level - 1)}{title} (page {page + 1 if page is not None else '?'})"
+            for level, title, page in outline
+        )
+    else:
+        outline_text = "(no outline available)"
+
+    completion = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You are a document navigator that decides which pages of a PDF need to be read."},
+            {"role": "user", "content": f"The PDF has {page_count} pages. Its outline is:\n{outline_text}"},
+            {"role": "user", "content": f"The text of the first {first_pages} pages is:\n{first_text}"},
+            {"role": "user", "content": f"Question to answer: {question}"},
+            {"role": "user", "content": "Which pages are needed to answer the question? Respond with only 1-based page ranges like 1-3,7,10-12 and nothing else."},
+        ],
+        temperature=0.0,
+        stream=False,
+    )
+    answer = completion.choices[0].message.content or ""
+    answer = re.sub(r'<think>.*?</think>', '', answer, flags=re.DOTALL)
+    match = PAGE_SPEC_RE.search(answer)
+    if not match:
+        return None
+    try:
+        pagenos = parse_page_ranges(match.group(0), page_count)
+    except ValueError:
+        return None
+    return format_page_ranges(list(range(first_pages)) + pagenos)
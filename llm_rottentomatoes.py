@@ -1,6 +1,10 @@
 import requests
 from bs4 import BeautifulSoup
 import json
+from llm_host_scheduler import HostScheduler
+
+# Movie pages are all on one host, so keep its concurrency and request rate polite
+scheduler = HostScheduler()
 
 def scrape_rotten_tomatoes(url="https://www.rottentomatoes.com/browse/movies_at_home/sort:popular"):
     """
@@ -88,8 +92,7 @@ def scrape_movie_details(movie_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(movie_url, headers=headers)
-        response.raise_for_status()
+        response = scheduler.fetch(movie_url, headers=headers)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching movie details from {movie_url}: {e}")
         return None
@@ -127,15 +130,17 @@ def main():
     movies = scrape_rotten_tomatoes()
     if movies:
         for movie in movies:
-            if movie['movie_url'] != "N/A":
-                movie_details = scrape_movie_details(movie['movie_url'])
-                if movie_details:
-                    combined_info = {**movie, **movie_details}
-                    print(json.dumps(combined_info))
-                else:
-                    print(json.dumps({**movie, 'details': 'Could not retrieve details'}))
-            else:
+            if movie['movie_url'] == "N/A":
                 print(json.dumps({**movie, 'details': 'Movie URL not available'}))
+        # Details are fetched concurrently and printed as each page arrives.
+        with_urls = [movie for movie in movies if movie['movie_url'] != "N/A"]
+        for index, movie_details in scheduler.map(lambda i: scrape_movie_details(with_urls[i]['movie_url']), range(len(with_urls))):
+            movie = with_urls[index]
+            if movie_details and not isinstance(movie_details, Exception):
+                combined_info = {**movie, **movie_details}
+                print(json.dumps(combined_info), flush=True)
+            else:
+                print(json.dumps({**movie, 'details': 'Could not retrieve details'}), flush=True)
     else:
         print("Could not retrieve movie data.")
 
@@ -4,6 +4,11 @@ import json
 import re
 import sys
 import urllib.parse
+import argparse
+from llm_host_scheduler import HostScheduler
+
+# Result pages all come from ebay.com, so keep concurrency and request rate polite
+scheduler = HostScheduler()
 
 def extract_ebay_data(url):
     """
@@ -15,17 +20,23 @@ def extract_ebay_data(url):
     Returns:
         str: A JSON array containing the extracted data.
     """
+    return json.dumps(extract_ebay_items(url), indent=4)
+
+
+def extract_ebay_items(url):
+    """
+    Fetches an eBay search results page and returns the sold items as a list of dictionaries.
+    """
 
     headers = {
         'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'
     }
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        response = scheduler.fetch(url, headers=headers)  # Cached; raises HTTPError for bad responses (4xx or 5xx)
     except requests.exceptions.RequestException as e:
-        print(f"Request error: {e}")
-        return json.dumps([])  # Return empty JSON array in case of error
+        print(f"Request error: {e}", file=sys.stderr)
+        return []  # Return an empty list in case of error
 
     soup = BeautifulSoup(response.content, 'html.parser')
 
@@ -114,16 +125,22 @@ def extract_ebay_data(url):
             'Image URL': img_url
         })
 
-    return json.dumps(data, indent=4)
+    return data
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        search_term = sys.argv[1]
-        # URL encode the search term
-        encoded_search_term = urllib.parse.quote_plus(search_term)
-        ebay_url = f"https://www.ebay.com/sch/i.html?_nkw={encoded_search_term}&LH_Complete=1&LH_Sold=1"
-        json_output = extract_ebay_data(ebay_url)
-        print(json_output)
+    parser = argparse.ArgumentParser(description="Scrape sold item history from eBay.")
+    parser.add_argument("search_term", help="The product or item to search for")
+    parser.add_argument("--pages", type=int, default=1, help="Number of result pages to fetch concurrently (default: 1)")
+    args = parser.parse_args()
+
+    # URL encode the search term
+    encoded_search_term = urllib.parse.quote_plus(args.search_term)
+    ebay_url = f"https://www.ebay.com/sch/i.html?_nkw={encoded_search_term}&LH_Complete=1&LH_Sold=1"
+    if args.pages <= 1:
+        print(extract_ebay_data(ebay_url))
     else:
-        print("Please provide a search term as a command-line argument.")
+        page_urls = [f"{ebay_url}&_pgn={page}" for page in range(1, args.pages + 1)]
+        pages = dict(scheduler.map(extract_ebay_items, page_urls))
+        items = [item for page_url in page_urls if not isinstance(pages[page_url], Exception) for item in pages[page_url]]
+        print(json.dumps(items, indent=4))
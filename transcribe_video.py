@@ -1,13 +1,680 @@
 #!/usr/bin/env python3
 
 import os
+import re
 import sys
+import glob
+import json
+import time
+import queue
+import struct
 import subprocess
 import tempfile
+import uuid
 import requests
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
-def transcribe_video(video_path, translate=False, server_url="http://localhost:9191/inference"):
+SERVER_URL = "http://localhost:9191/inference"
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # 16-bit mono PCM
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# --split: energy-based voice activity detection and chunking
+VAD_FRAME_SECONDS = 0.03
+VAD_THRESHOLD_DB = 12      # speech is at least this far above the noise floor
+VAD_MIN_DBFS = -50         # floor on the threshold: frames quieter than this are always silence
+VAD_MIN_SILENCE = 0.6      # shorter pauses stay inside a speech span
+VAD_MIN_SPEECH = 0.25      # shorter blips are dropped
+VAD_PADDING = 0.2          # context kept around each speech span
+MAX_CHUNK_SECONDS = 300
+CUT_SEARCH_SECONDS = 5     # an over-long span is cut at the quietest frame this close to the limit
+VAD_BLOCK_SECONDS = 60     # audio is measured in blocks this long to bound memory
+CHUNK_GAP_SECONDS = 0.5    # silence left between speech spans inside one chunk
+CHUNK_TIMEOUT = 900
+# Batch mode
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".webm", ".m4v", ".wmv", ".flv", ".mpg", ".mpeg", ".ts",
+                    ".mp3", ".m4a", ".wav", ".flac", ".ogg", ".opus"}
+QUEUE_FILE = "transcribe_video-queue.jsonl"
+FILE_TIMEOUT = 3600
+SRT_TIME_RE = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)")
+
+def probe_duration(media_path):
+    """Returns the media duration in seconds as reported by ffprobe."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", media_path],
+        check=True, capture_output=True, text=True,
+    )
+    return float(result.stdout.strip())
+
+def wav_header(num_samples):
+    """Returns a 44-byte WAV header for num_samples of 16kHz mono 16-bit PCM."""
+    data_size = num_samples * BYTES_PER_SAMPLE
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * BYTES_PER_SAMPLE, BYTES_PER_SAMPLE, 16,
+        b"data", data_size,
+    )
+
+class PCMUploadBody:
+    """
+    A file-like multipart/form-data body that streams ffmpeg's PCM output.
+
+    The WAV header is written up front for a fixed sample count (from
+    ffprobe), and the PCM stream is padded with silence or truncated to match,
+    so the total length is known and requests sends a Content-Length instead
+    of buffering the audio.
+    """
+
+    def __init__(self, process, num_samples, fields, filename="audio.wav"):
+        self.boundary = uuid.uuid4().hex
+        self.process = process
+        self.pcm_remaining = num_samples * BYTES_PER_SAMPLE
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n"
+            )
+        parts.append(
+            f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            "Content-Type: audio/wav\r\n\r\n"
+        )
+        self.head = "".join(parts).encode("utf-8") + wav_header(num_samples)
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.length = len(self.head) + self.pcm_remaining + len(self.tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = UPLOAD_CHUNK_SIZE
+        if self.head:
+            chunk, self.head = self.head[:size], self.head[size:]
+            return chunk
+        if self.pcm_remaining:
+            chunk = self.process.stdout.read(min(size, self.pcm_remaining))
+            if not chunk:
+                if self.process.wait() != 0:
+                    raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+                # ffmpeg produced fewer samples than probed: pad with silence
+                chunk = b"\x00" * min(size, self.pcm_remaining)
+            self.pcm_remaining -= len(chunk)
+            return chunk
+        chunk, self.tail = self.tail[:size], self.tail[size:]
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def request_params(translate):
+    """Returns the form fields for the whisper-server inference request."""
+    params = {"response_format": "srt"}
+    if translate:
+        params["translate"] = "true"
+    return params
+
+def write_srt(video_path, srt_text):
+    """Writes the SRT next to the video and returns its path, or None on error."""
+    srt_path = os.path.splitext(video_path)[0] + ".srt"
+    try:
+        with open(srt_path, "w", encoding="utf-8") as srt_file:
+            srt_file.write(srt_text)
+        print(f"Successfully created SRT file: {srt_path}")
+        return srt_path
+    except IOError as e:
+        print(f"Error writing SRT file: {e}")
+        return None
+
+def transcribe_video_streaming(video_path, translate=False, server_url=SERVER_URL):
+    """
+    Transcribes a video by piping ffmpeg's PCM output straight into the upload.
+
+    Audio extraction and upload overlap and no temporary WAV file is written.
+    """
+    if not os.path.exists(video_path):
+        print(f"Error: Video file not found at '{video_path}'")
+        return
+
+    print(f"Processing video: {video_path}")
+    if translate:
+        print("Translation to English requested.")
+
+    try:
+        num_samples = round(probe_duration(video_path) * SAMPLE_RATE)
+    except FileNotFoundError:
+        print("Error: 'ffprobe' not found. Please make sure ffmpeg is installed and in your system's PATH.")
+        return
+    except (subprocess.CalledProcessError, ValueError) as e:
+        print(f"Error: Could not determine the duration of '{video_path}': {e}")
+        return
+
+    command = [
+        "ffmpeg",
+        "-i", video_path,
+        "-vn",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le",
+        "-loglevel", "error",
+        "pipe:1",
+    ]
+    # stderr goes to a file: an unread pipe would fill up on a damaged input
+    # and stall ffmpeg while the upload waits for its stdout.
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+    except FileNotFoundError:
+        stderr_file.close()
+        print("Error: 'ffmpeg' not found. Please make sure it is installed and in your system's PATH.")
+        return
+
+    body = PCMUploadBody(process, num_samples, request_params(translate), os.path.basename(video_path) + ".wav")
+    try:
+        print(f"Streaming audio to whisper server at {server_url}...")
+        response = requests.post(server_url, data=body, headers={"Content-Type": body.content_type}, timeout=3600)
+        response.raise_for_status()
+    except RuntimeError as e:
+        print(f"Error during ffmpeg audio extraction: {e}")
+        stderr_file.seek(0)
+        print(stderr_file.read().decode("utf-8", errors="ignore"))
+        return
+    except requests.exceptions.RequestException as e:
+        print(f"Error sending request to whisper server: {e}")
+        return
+    finally:
+        # ffmpeg may still be writing if the server gave up early.
+        process.kill()
+        process.wait()
+        process.stdout.close()
+        stderr_file.close()
+
+    write_srt(video_path, response.text)
+
+def extract_pcm(video_path):
+    """
+    Decodes the audio track to 16kHz mono 16-bit PCM in memory.
+
+    Raises RuntimeError if ffmpeg is missing or fails.
+    """
+    command = [
+        "ffmpeg",
+        "-i", video_path,
+        "-vn",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le",
+        "-loglevel", "error",
+        "pipe:1",
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError("'ffmpeg' not found. Please make sure it is installed and in your system's PATH.")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", errors="ignore").strip())
+    return result.stdout
+
+def frame_energy(samples, first, count, frame):
+    """
+    Returns the sum of squares of each of count frames starting at frame first.
+
+    Works through VAD_BLOCK_SECONDS at a time on int64 copies of the int16
+    samples, so a long recording needs no full-size float temporaries.
+    """
+    import numpy as np
+
+    energy = np.empty(count, dtype=np.float64)
+    block_frames = max(1, int(VAD_BLOCK_SECONDS / VAD_FRAME_SECONDS))
+    for offset in range(0, count, block_frames):
+        n = min(block_frames, count - offset)
+        start = (first + offset) * frame
+        block = samples[start:start + n * frame].reshape(n, frame).astype(np.int64)
+        energy[offset:offset + n] = np.einsum("ij,ij->i", block, block)
+    return energy
+
+def detect_speech(pcm):
+    """
+    Returns (start, end) sample ranges that contain speech.
+
+    Frames count as speech when they are VAD_THRESHOLD_DB above the noise floor
+    of the recording (its quietest frames), so the threshold adapts to
+    recordings with and without background noise. Pauses shorter than
+    VAD_MIN_SILENCE are kept inside a span.
+    """
+    import numpy as np  # only --split needs numpy
+
+    samples = np.frombuffer(pcm, dtype="<i2")
+    frame = int(SAMPLE_RATE * VAD_FRAME_SECONDS)
+    count = len(samples) // frame
+    if not count:
+        return []
+    level = 10 * np.log10(frame_energy(samples, 0, count, frame) / frame / 32768 ** 2 + 1e-18)
+    noise_floor = np.percentile(level, 10)
+    loud = np.percentile(level, 95)
+    # Cap the threshold below the loud frames so a recording with no silence
+    # at all (its "noise floor" is speech) is not dropped wholesale.
+    threshold = max(min(noise_floor + VAD_THRESHOLD_DB, loud - 20), VAD_MIN_DBFS)
+
+    max_gap = int(VAD_MIN_SILENCE / VAD_FRAME_SECONDS)
+    frame_spans = []
+    for index in np.flatnonzero(level > threshold):
+        if frame_spans and index - frame_spans[-1][1] <= max_gap:
+            frame_spans[-1][1] = index + 1
+        else:
+            frame_spans.append([index, index + 1])
+
+    padding = int(VAD_PADDING * SAMPLE_RATE)
+    spans = []
+    for first, last in frame_spans:
+        if (last - first) * VAD_FRAME_SECONDS < VAD_MIN_SPEECH:
+            continue
+        start = max(0, int(first) * frame - padding)
+        end = min(len(samples), int(last) * frame + padding)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+def split_span(pcm, start, end, max_samples):
+    """
+    Splits a speech span longer than max_samples into pieces.
+
+    Each cut is placed in the quietest frame within CUT_SEARCH_SECONDS before
+    the limit, so pieces end in a pause between words where there is one.
+    """
+    import numpy as np
+
+    samples = np.frombuffer(pcm, dtype="<i2")
+    frame = int(SAMPLE_RATE * VAD_FRAME_SECONDS)
+    pieces = []
+    while end - start > max_samples:
+        limit = start + max_samples
+        window_start = max(start + frame, limit - int(CUT_SEARCH_SECONDS * SAMPLE_RATE))
+        count = (limit - window_start) // frame
+        if count < 1:
+            cut = limit
+        else:
+            energy = frame_energy(samples[window_start:], 0, count, frame)
+            # Latest of equally quiet frames, so pieces stay close to max_samples.
+            quietest = count - 1 - int(np.argmin(energy[::-1]))
+            cut = window_start + quietest * frame + frame // 2
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+def plan_chunks(pcm, spans, max_seconds=MAX_CHUNK_SECONDS):
+    """
+    Groups speech spans into chunks of at most max_seconds of audio.
+
+    Chunks are only cut at silences, except that a single span longer than
+    max_seconds is split at its quietest points (see split_span). Returns a
+    list of span lists.
+    """
+    max_samples = int(max_seconds * SAMPLE_RATE)
+    gap = int(CHUNK_GAP_SECONDS * SAMPLE_RATE)
+    chunks = []
+    size = 0
+    for start, end in spans:
+        for piece in split_span(pcm, start, end, max_samples):
+            length = piece[1] - piece[0]
+            if chunks and size + gap + length <= max_samples:
+                chunks[-1].append(piece)
+                size += gap + length
+            else:
+                chunks.append([piece])
+                size = length
+    return chunks
+
+def build_chunk(pcm, spans):
+    """
+    Joins the chunk's speech spans, separated by short silences, into a WAV.
+
+    Returns (wav_bytes, segments) where segments maps the chunk timeline back to
+    the source as (chunk_start, source_start, source_end) tuples in seconds.
+    """
+    gap = b"\x00" * (int(CHUNK_GAP_SECONDS * SAMPLE_RATE) * BYTES_PER_SAMPLE)
+    parts = []
+    segments = []
+    position = 0
+    for start, end in spans:
+        if parts:
+            parts.append(gap)
+            position += len(gap) // BYTES_PER_SAMPLE
+        parts.append(pcm[start * BYTES_PER_SAMPLE:end * BYTES_PER_SAMPLE])
+        segments.append((position / SAMPLE_RATE, start / SAMPLE_RATE, end / SAMPLE_RATE))
+        position += end - start
+    return wav_header(position) + b"".join(parts), segments
+
+def to_source_time(seconds, segments):
+    """Maps a time in a chunk back to the source recording."""
+    for chunk_start, source_start, source_end in reversed(segments):
+        if seconds >= chunk_start:
+            return min(source_start + seconds - chunk_start, source_end)
+    return segments[0][1]
+
+def parse_srt(srt_text):
+    """Returns the cues of an SRT document as (start, end, text) with times in seconds."""
+    cues = []
+    for block in re.split(r"\n\s*\n", srt_text.replace("\r\n", "\n").strip()):
+        lines = block.split("\n")
+        for index, line in enumerate(lines):
+            match = SRT_TIME_RE.search(line)
+            if match:
+                h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(value) for value in match.groups())
+                start = h1 * 3600 + m1 * 60 + s1 + ms1 / 1000
+                end = h2 * 3600 + m2 * 60 + s2 + ms2 / 1000
+                text = "\n".join(lines[index + 1:]).strip()
+                if text:
+                    cues.append((start, end, text))
+                break
+    return cues
+
+def format_srt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+def stitch_srt(chunk_results):
+    """
+    Combines per-chunk SRT output into one document.
+
+    chunk_results is a list of (srt_text, segments) in chunk order. Cue times
+    are mapped back to the source recording and cues are renumbered.
+    """
+    entries = []
+    for srt_text, segments in chunk_results:
+        for start, end, text in parse_srt(srt_text):
+            entries.append((to_source_time(start, segments), to_source_time(end, segments), text))
+    return "".join(
+        f"{number}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+        for number, (start, end, text) in enumerate(entries, 1)
+    )
+
+class ServerPool:
+    """
+    Hands out whisper-server slots: each server handles up to slots requests at once.
+
+    Shared by every file and chunk in a run, so --split chunks from several
+    files never oversubscribe a server.
+    """
+
+    def __init__(self, servers, slots=1):
+        self.servers = list(servers)
+        self.size = len(self.servers) * slots
+        self.free = queue.Queue()
+        for _ in range(slots):
+            for server_url in self.servers:
+                self.free.put(server_url)
+
+    def transcribe(self, wav, filename, translate=False, timeout=CHUNK_TIMEOUT):
+        """
+        Posts a WAV to the next free server and returns the SRT text.
+
+        A failed request is retried on the next free server. Raises
+        RuntimeError if every attempt fails.
+        """
+        errors = []
+        for _ in range(max(2, len(self.servers))):
+            server_url = self.free.get()
+            try:
+                response = requests.post(
+                    server_url,
+                    files={"file": (filename, wav, "audio/wav")},
+                    data=request_params(translate),
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                return response.text
+            except requests.exceptions.RequestException as e:
+                errors.append(f"{server_url}: {e}")
+            finally:
+                self.free.put(server_url)
+        raise RuntimeError("; ".join(errors))
+
+def transcribe_chunks(pcm, chunks, pool, translate=False, progress=True):
+    """
+    Transcribes the chunks concurrently on the server pool.
+
+    Returns the stitched SRT text. Raises RuntimeError if a chunk fails on
+    every attempt.
+    """
+    def transcribe_chunk(index):
+        wav, segments = build_chunk(pcm, chunks[index])
+        try:
+            return pool.transcribe(wav, f"chunk{index:04d}.wav", translate), segments
+        except RuntimeError as e:
+            raise RuntimeError(f"chunk {index + 1} failed: {e}")
+
+    results = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = {executor.submit(transcribe_chunk, index): index for index in range(len(chunks))}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress:
+                print(f"Transcribed chunk {done}/{len(chunks)}")
+    return stitch_srt(results)
+
+def transcribe_video_split(video_path, translate=False, servers=(SERVER_URL,), slots=1, max_chunk=MAX_CHUNK_SECONDS):
+    """
+    Transcribes a long video in parallel chunks split at silences.
+
+    Silent spans are not sent to the server at all, and the chunk SRTs are
+    stitched back together with source timestamps.
+    """
+    if not os.path.exists(video_path):
+        print(f"Error: Video file not found at '{video_path}'")
+        return
+
+    print(f"Processing video: {video_path}")
+    if translate:
+        print("Translation to English requested.")
+
+    try:
+        print("Extracting audio with ffmpeg...")
+        pcm = extract_pcm(video_path)
+    except RuntimeError as e:
+        print(f"Error during ffmpeg audio extraction: {e}")
+        return
+
+    spans = detect_speech(pcm)
+    chunks = plan_chunks(pcm, spans, max_chunk)
+    total = len(pcm) / BYTES_PER_SAMPLE / SAMPLE_RATE
+    speech = sum(end - start for start, end in spans) / SAMPLE_RATE
+    print(f"Found {speech:.0f}s of speech in {total:.0f}s of audio; sending {len(chunks)} chunks "
+          f"to {len(servers)} server(s) with {slots} slot(s) each...")
+
+    try:
+        srt_text = transcribe_chunks(pcm, chunks, ServerPool(servers, slots), translate)
+    except RuntimeError as e:
+        print(f"Error sending request to whisper server: {e}")
+        return
+
+    write_srt(video_path, srt_text)
+
+def transcribe_pcm(pcm, pool, name, translate=False, split=False, max_chunk=MAX_CHUNK_SECONDS):
+    """Transcribes decoded audio on the server pool, in chunks if split is set, and returns the SRT text."""
+    if split:
+        chunks = plan_chunks(pcm, detect_speech(pcm), max_chunk)
+        return transcribe_chunks(pcm, chunks, pool, translate, progress=False)
+    wav = wav_header(len(pcm) // BYTES_PER_SAMPLE) + pcm
+    return pool.transcribe(wav, name + ".wav", translate, timeout=FILE_TIMEOUT)
+
+def is_batch_source(source):
+    """Returns True for a directory or glob pattern; an existing file is never a pattern."""
+    # Media names often contain brackets ("Show [1080p].mp4"), which glob reads as a character class.
+    if os.path.isfile(source):
+        return False
+    return os.path.isdir(source) or glob.has_magic(source)
+
+def iter_media_files(source):
+    """Yields media files from a directory (searched recursively) or a glob pattern."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                    yield os.path.join(root, name)
+        return
+    for path in sorted(glob.glob(source, recursive=True)):
+        if os.path.isfile(path):
+            yield path
+
+def srt_is_current(video_path):
+    """Returns True if the video's .srt exists and is newer than the video."""
+    srt_path = os.path.splitext(video_path)[0] + ".srt"
+    try:
+        return os.path.getmtime(srt_path) > os.path.getmtime(video_path)
+    except OSError:
+        return False
+
+def file_mtime(path):
+    """Returns the file's modification time, or None if it is gone."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def load_failed(queue_path):
+    """
+    Returns {path: mtime} for files whose latest record in the queue file failed.
+
+    A truncated last line from an interrupted run is ignored.
+    """
+    failed = {}
+    if not os.path.exists(queue_path):
+        return failed
+    with open(queue_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" in record:
+                failed[record["path"]] = record.get("mtime")
+            else:
+                failed.pop(record.get("path"), None)
+    return failed
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def run_batch(source, pool, queue_path=QUEUE_FILE, translate=False, split=False, max_chunk=MAX_CHUNK_SECONDS,
+              extract_workers=2, transcribe_workers=None, retry_errors=False):
+    """
+    Transcribes every media file in a directory or glob pattern.
+
+    Files whose .srt is newer than the video are skipped. Every finished or
+    failed file is appended to queue_path, and files that failed are not
+    retried on the next run unless retry_errors is set or the file changed.
+    Audio extraction (ffmpeg, CPU bound) and transcription (server bound) run
+    on separate pools, and extraction only runs a few files ahead so decoded
+    audio does not pile up in memory.
+    """
+    if split:
+        try:
+            import numpy  # detect_speech needs it; fail before decoding anything
+        except ImportError:
+            print("Error: --split requires numpy. Install it with 'pip install numpy'.")
+            return
+
+    transcribe_workers = transcribe_workers or pool.size
+    failed = {} if retry_errors else load_failed(queue_path)
+    jobs = []
+    skipped = 0
+    for path in iter_media_files(source):
+        if srt_is_current(path) or (path in failed and failed[path] == file_mtime(path)):
+            skipped += 1
+        else:
+            jobs.append(path)
+    print(f"{len(jobs)} files to transcribe, {skipped} skipped (up to date or previously failed)")
+    if not jobs:
+        return
+
+    pending = iter(jobs)
+    exhausted = False
+    extracting = {}
+    transcribing = {}
+    finished = 0
+    errors = 0
+    audio_seconds = 0.0
+    start = time.time()
+
+    with ThreadPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=transcribe_workers) as transcribe_pool, \
+            open(queue_path, "a", encoding="utf-8") as journal:
+
+        def finish(path, **fields):
+            nonlocal finished, errors
+            record = {"path": path, "mtime": file_mtime(path), **fields}
+            journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            journal.flush()
+            finished += 1
+            if "error" in fields:
+                errors += 1
+                print(f"Error: {path}: {fields['error']}")
+            elapsed = time.time() - start
+            eta = elapsed / finished * (len(jobs) - finished)
+            speed = f", {audio_seconds / elapsed:.1f}x realtime" if audio_seconds else ""
+            print(f"[{finished}/{len(jobs)}] {path} (elapsed {format_duration(elapsed)}, "
+                  f"ETA {format_duration(eta)}{speed}, {errors} failed)")
+
+        while True:
+            while (not exhausted and len(extracting) < extract_workers * 2
+                   and len(transcribing) < transcribe_workers * 2):
+                path = next(pending, None)
+                if path is None:
+                    exhausted = True
+                    break
+                extracting[extract_pool.submit(extract_pcm, path)] = path
+
+            if not extracting and not transcribing:
+                break
+
+            done, _ = wait(list(extracting) + list(transcribing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    path = extracting.pop(future)
+                    try:
+                        pcm = future.result()
+                    except Exception as e:
+                        finish(path, error=f"audio extraction failed: {e}")
+                        continue
+                    name = os.path.basename(path)
+                    job = transcribe_pool.submit(transcribe_pcm, pcm, pool, name, translate, split, max_chunk)
+                    transcribing[job] = (path, len(pcm) / BYTES_PER_SAMPLE / SAMPLE_RATE)
+                else:
+                    path, duration = transcribing.pop(future)
+                    try:
+                        srt_text = future.result()
+                    except Exception as e:
+                        finish(path, error=f"transcription failed: {e}")
+                        continue
+                    if write_srt(path, srt_text) is None:
+                        finish(path, error="could not write SRT file")
+                        continue
+                    audio_seconds += duration
+                    finish(path, audio_seconds=round(duration, 1))
+
+    print(f"Batch complete: {finished - errors} transcribed, {errors} failed, "
+          f"{format_duration(time.time() - start)} total; queue in {queue_path}")
+
+def transcribe_video(video_path, translate=False, server_url=SERVER_URL):
     """
     Transcribes a video file using a whisper.cpp server.
 
@@ -59,10 +726,8 @@ def transcribe_video(video_path, translate=False, server_url="http://localhost:9
         print(f"Sending audio to whisper server at {server_url}...")
         with open(tmp_wav_path, "rb") as audio_file:
             files = {"file": (os.path.basename(tmp_wav_path), audio_file, "audio/wav")}
-            params = {"response_format": "srt"}
-            if translate:
-                params["translate"] = "true"
-            
+            params = request_params(translate)
+
             response = requests.post(server_url, files=files, data=params, timeout=3600) # 1 hour timeout
             response.raise_for_status()
 
@@ -75,20 +740,35 @@ def transcribe_video(video_path, translate=False, server_url="http://localhost:9
         os.remove(tmp_wav_path)
 
     # 3. Save response to SRT file
-    srt_path = os.path.splitext(video_path)[0] + ".srt"
-    try:
-        with open(srt_path, "w", encoding="utf-8") as srt_file:
-            srt_file.write(response.text)
-        print(f"Successfully created SRT file: {srt_path}")
-    except IOError as e:
-        print(f"Error writing SRT file: {e}")
+    write_srt(video_path, response.text)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Transcribe a video file using a whisper.cpp server.")
-    parser.add_argument("video_path", help="The path to the video file.")
+    parser.add_argument("video_path", help="The path to the video file, or a directory or quoted glob pattern to transcribe in batch.")
     parser.add_argument("--translate", action="store_true", help="Request translation to English.")
-    
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true", help="Pipe ffmpeg's audio straight into the upload instead of writing a temporary WAV file.")
+    mode.add_argument("--split", action="store_true", help="Drop silence, split the audio at pauses and transcribe the chunks in parallel.")
+    parser.add_argument("--server", action="append", dest="servers", help=f"whisper.cpp server inference endpoint; repeat to spread --split chunks over several servers (default: {SERVER_URL}).")
+    parser.add_argument("--slots", type=int, default=1, help="Concurrent --split requests per server (default: 1).")
+    parser.add_argument("--queue", default=QUEUE_FILE, help=f"Batch job log used to resume and to remember failed files (default: {QUEUE_FILE}).")
+    parser.add_argument("--retry-errors", action="store_true", help="In batch mode, retry files that failed on a previous run.")
+    parser.add_argument("--extract-workers", type=int, default=2, help="Concurrent ffmpeg audio extractions in batch mode (default: 2).")
+    parser.add_argument("--transcribe-workers", type=int, help="Files transcribed concurrently in batch mode (default: servers x slots).")
+    parser.add_argument("--max-chunk", type=float, default=MAX_CHUNK_SECONDS, help=f"Longest --split chunk in seconds (default: {MAX_CHUNK_SECONDS}).")
+
     args = parser.parse_args()
+    servers = args.servers or [SERVER_URL]
 
-    transcribe_video(args.video_path, args.translate)
+    if is_batch_source(args.video_path):
+        if args.stream:
+            parser.error("--stream cannot be used in batch mode")
+        run_batch(args.video_path, ServerPool(servers, args.slots), args.queue, args.translate, args.split, args.max_chunk,
+                  args.extract_workers, args.transcribe_workers, args.retry_errors)
+    elif args.split:
+        transcribe_video_split(args.video_path, args.translate, servers, args.slots, args.max_chunk)
+    elif args.stream:
+        transcribe_video_streaming(args.video_path, args.translate, servers[0])
+    else:
+        transcribe_video(args.video_path, args.translate, servers[0])